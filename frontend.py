@@ -53,6 +53,22 @@ def get_grade_points(marks):
     elif marks >= 40: return 4
     else: return 0
 
+def stream_answer(question):
+    """Yields answer tokens from the /ask/stream Server-Sent Events as they arrive."""
+    with requests.post(f"{API_BASE_URL}/ask/stream", json={"question": question}, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "token":
+                    yield data["token"]
+                elif event == "error":
+                    raise RuntimeError(data["detail"])
+
 # --- SIDEBAR PROFILE ---
 st.sidebar.title("🎓 Smart Finder-Bot")
 st.sidebar.markdown("---")
@@ -242,11 +258,8 @@ elif page == "🤖 Rules Advisor":
             context = f"[User Context: Name={p['name']}, SGPA={p['current_sgpa']}, Failures={p['failures']}] "
 
         with st.chat_message("assistant"):
-            with st.spinner("Consulting Librarian..."):
-                try:
-                    response = requests.post(f"{API_BASE_URL}/ask", json={"question": context + prompt})
-                    if response.status_code == 200:
-                        bot_reply = response.json().get("answer", "Error.")
-                        st.markdown(bot_reply)
-                        st.session_state.messages.append({"role": "assistant", "content": bot_reply})
-                except: st.error("Connection Error")
\ No newline at end of file
+            try:
+                # Tokens appear as the Brain generates them (no spinner for the whole answer)
+                bot_reply = st.write_stream(stream_answer(context + prompt))
+                st.session_state.messages.append({"role": "assistant", "content": bot_reply})
+            except: st.error("Connection Error")
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+import numpy as np
+
+from src.brain.toolbelt import metrics
+
+# 1. Configuration
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 512))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.92))  # Cosine similarity
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 3600))           # Seconds
+
+# 2. The Semantic Cache
+class SemanticAnswerCache:
+    """
+    Remembers (question embedding, retrieved chunk ids, answer). A new question reuses an answer
+    when it is at least `threshold` cosine-similar to a stored question AND retrieved the same chunks,
+    so "how many attempts for re-exam?" and "re-exam attempts allowed?" share one Ollama call.
+    Holds at most `max_entries`; the least recently used entry makes room for a new one.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, threshold=ANSWER_CACHE_THRESHOLD, ttl_seconds=ANSWER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._vectors = None                      # (max_entries, dim) float32, unit length
+        self._entries = [None] * max_entries      # (chunk_ids, answer, created)
+        self._last_used = np.full(max_entries, -np.inf)
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_version(self, version):
+        # The rules changed: every stored answer may now be wrong
+        if version != self._version:
+            self._entries = [None] * self.max_entries
+            self._last_used[:] = -np.inf
+            self._version = version
+
+    def lookup(self, embedding, chunk_ids, version):
+        query = self._unit(embedding)
+        chunk_ids = tuple(sorted(chunk_ids))
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(version)
+            if self._vectors is None:
+                metrics.increment("answer_cache.misses")
+                return None
+            similarity = self._vectors @ query
+            similarity[np.isinf(self._last_used)] = -1.0  # Empty slots
+            for slot in np.argsort(-similarity):
+                if similarity[slot] < self.threshold:
+                    break
+                stored_ids, answer, created = self._entries[slot]
+                if stored_ids == chunk_ids and now - created <= self.ttl_seconds:
+                    self._last_used[slot] = now
+                    metrics.increment("answer_cache.hits")
+                    return answer
+        metrics.increment("answer_cache.misses")
+        return None
+
+    def store(self, embedding, chunk_ids, answer, version):
+        vector = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            slot = int(np.argmin(self._last_used))  # An empty slot, else the least recently used
+            self._vectors[slot] = vector
+            self._entries[slot] = (tuple(sorted(chunk_ids)), answer, now)
+            self._last_used[slot] = now
+
+    def size(self):
+        with self._lock:
+            return int(np.count_nonzero(~np.isinf(self._last_used)))
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import math
+import threading
+import numpy as np
+from collections import Counter
+from langchain_core.documents import Document
+
+# The Index Cards: a BM25 inverted index over the same chunks as the vector store.
+# Embeddings blur exact tokens like "220B 6.1", "DX" or "BCSL404"; this finds them verbatim.
+# Built by ingest.py, persisted as one JSON file, loaded lazily by the API and reloaded when it changes.
+
+# 1. Configuration
+COLLECTION_NAME = "university_rules"
+BM25_FILE = os.getenv("BM25_FILE", os.path.join("data", "index", f"{COLLECTION_NAME}.bm25.json"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Clause numbers stay whole ("6.1.2"), codes stay whole ("bcsl404", "220b")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "is", "are", "be", "by", "with",
+    "as", "at", "it", "this", "that", "what", "which", "who", "how", "do", "does", "i", "my", "can",
+}
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def _load(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["docs"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+# 2. Read Side (the API)
+class BM25Index:
+    def __init__(self, path=BM25_FILE):
+        self.path = path
+        self._stamp = None
+        self.records = []
+        self.postings = {}  # term -> (doc indexes, term frequencies) as arrays
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def load(self):
+        stamp = _stamp(self.path)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            docs = _load(self.path) or {}
+            records, lengths, postings = [], [], {}
+            for i, (cid, doc) in enumerate(docs.items()):
+                records.append((cid, doc["document"], doc["metadata"]))
+                lengths.append(doc["length"])
+                for term, tf in doc["tf"].items():
+                    postings.setdefault(term, ([], []))
+                    postings[term][0].append(i)
+                    postings[term][1].append(tf)
+            self.postings = {t: (np.array(ix, dtype=np.int32), np.array(tf, dtype=np.float32)) for t, (ix, tf) in postings.items()}
+            self.records = records
+            self.doc_lengths = np.array(lengths, dtype=np.float32)
+            self._stamp = stamp
+            if records:
+                print(f"🗂️  BM25 index loaded: {len(records)} chunks, {len(postings)} terms.")
+
+    def search(self, question, k=10):
+        self.load()
+        records, postings, lengths = self.records, self.postings, self.doc_lengths
+        n = len(records)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+        for term in set(tokenize(question)):
+            if term not in postings:
+                continue
+            ix, tf = postings[term]
+            idf = math.log(1 + (n - len(ix) + 0.5) / (len(ix) + 0.5))
+            scores[ix] += idf * tf * (BM25_K1 + 1) / (tf + norm[ix])
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:k]]
+        return [Document(id=records[i][0], page_content=records[i][1], metadata=records[i][2]) for i in top]
+
+_bm25_index = None
+
+def get_bm25_index():
+    global _bm25_index
+    if _bm25_index is None:
+        _bm25_index = BM25Index()
+    return _bm25_index
+
+# 3. Write Side (ingest.py): incremental add/delete, whole file rewritten atomically on save()
+class BM25Writer:
+    def __init__(self, path=BM25_FILE):
+        self.path = path
+        self.docs = _load(path) or {}
+        self.dirty = False
+
+    def clear(self):
+        self.docs.clear()
+        self.dirty = True
+
+    def add(self, docs):
+        for doc in docs:
+            tokens = tokenize(doc.page_content)
+            self.docs[doc.metadata["chunk_id"]] = {
+                "document": doc.page_content,
+                "metadata": doc.metadata,
+                "length": len(tokens),
+                "tf": dict(Counter(tokens)),
+            }
+        self.dirty = self.dirty or bool(docs)
+
+    def delete(self, ids):
+        for cid in ids:
+            self.dirty = self.docs.pop(cid, None) is not None or self.dirty
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": BM25_K1, "b": BM25_B, "docs": self.docs}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
\ No newline at end of file
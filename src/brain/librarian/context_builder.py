@@ -0,0 +1,107 @@
+import os
+import re
+from typing import NamedTuple
+from src.brain.librarian.bm25_index import tokenize
+
+# The Editor: turns the retrieved chunks into the smallest context that still answers the question.
+# Every token in the system prompt is prefill work for phi3:mini, so we:
+#   1. cut the text adjacent chunks share (the splitter overlaps them by up to 100 chars)
+#   2. drop chunks that say (nearly) the same thing as a better-ranked one
+#   3. keep the sentences that share the most words with the question, until the token budget is spent
+
+# 1. Configuration
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 512))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", 0.8))  # Shingle Jaccard
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 200  # ingest.py's CHUNK_OVERLAP is 100; the splitter may cut a little past it
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+class Context(NamedTuple):
+    text: str
+    tokens: int              # Estimated tokens of text
+    chunks_used: int
+    duplicates_dropped: int
+    sentences_kept: int
+    sentences_total: int
+
+def estimate_tokens(text):
+    # ~4 characters per token for English with the Llama/phi3 tokenizers: close enough to budget with
+    return (len(text) + 3) // 4
+
+# 2. Overlap + Duplicates
+def overlap_size(first, second):
+    """
+    Length of the longest suffix of first that is also a prefix of second (0 if shorter than MIN_OVERLAP_CHARS).
+    """
+    limit = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+def shingles(text, size=3):
+    words = tokenize(text)
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+def is_duplicate(a, b, threshold=CONTEXT_DUPLICATE_THRESHOLD):
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= threshold
+
+def clean_chunks(texts):
+    """
+    Returns (kept texts in rank order, number of near-duplicates dropped).
+    """
+    kept, kept_shingles, dropped = [], [], 0
+    for text in texts:
+        for other in kept:
+            # Either neighbour could come first in the PDF
+            text = text[overlap_size(other, text):].lstrip()
+            size = overlap_size(text, other)
+            if size:
+                text = text[:-size].rstrip()
+        current = shingles(text)
+        if not text.strip() or any(is_duplicate(current, seen) for seen in kept_shingles):
+            dropped += 1
+            continue
+        kept.append(text)
+        kept_shingles.append(current)
+    return kept, dropped
+
+# 3. Sentence Selection + Packing
+def build_context(question, texts, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    texts are the retrieved chunks, best first. Sentences are picked by how many question words they
+    contain (ties: better chunk, earlier sentence), then put back in document order per chunk.
+    """
+    chunks, dropped = clean_chunks(texts)
+    question_terms = set(tokenize(question))
+
+    sentences = []  # (score, chunk_rank, position, text)
+    for rank, chunk in enumerate(chunks):
+        for position, sentence in enumerate(s.strip() for s in SENTENCE_SPLIT.split(chunk)):
+            if sentence:
+                score = len(question_terms & set(tokenize(sentence)))
+                sentences.append((score, rank, position, sentence))
+
+    chosen, used = [], 0
+    for score, rank, position, sentence in sorted(sentences, key=lambda s: (-s[0], s[1], s[2])):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            continue
+        chosen.append((rank, position, sentence))
+        used += cost
+
+    blocks = {}
+    for rank, position, sentence in sorted(chosen):
+        blocks.setdefault(rank, []).append(sentence)
+    text = "\n\n".join(" ".join(block) for _, block in sorted(blocks.items()))
+    return Context(
+        text=text,
+        tokens=estimate_tokens(text),
+        chunks_used=len(blocks),
+        duplicates_dropped=dropped,
+        sentences_kept=len(chosen),
+        sentences_total=len(sentences),
+    )
\ No newline at end of file
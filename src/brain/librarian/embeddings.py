@@ -0,0 +1,89 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from src.brain.toolbelt import metrics
+
+# 1. Configuration
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", 32))       # Most queries folded into one forward pass
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", 5))  # How long the first query waits for company
+
+# 2. The Micro-Batcher
+class BatchingEmbeddings(Embeddings):
+    """
+    The one Translator for the whole process. Concurrent embed_query() calls (from /ask, /search, ...)
+    are queued and embedded together in a single model call, up to EMBED_MAX_BATCH at a time.
+    embed_documents() is already a batch and goes straight to the model.
+    """
+
+    def __init__(self, model, max_batch=EMBED_MAX_BATCH, max_wait_ms=EMBED_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _collect(self):
+        # Block for the first query, then gather whatever else arrives within the wait window
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                vectors = self.model.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            metrics.increment("embeddings.batches")
+            metrics.increment("embeddings.queries", len(batch))
+            metrics.observe("embeddings.batch", time.perf_counter() - started)
+
+# 3. The Shared Instance (one model in memory, whoever asks first loads it)
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                print(f"🧠 Loading AI Model ({EMBEDDING_MODEL.split('/')[-1]})...")
+                _embeddings = BatchingEmbeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL))
+    return _embeddings
@@ -0,0 +1,190 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+from langchain_core.documents import Document
+
+# The Pocket Librarian: the rules collection as a plain NumPy matrix on disk, for instances without Postgres.
+# Layout of LOCAL_INDEX_DIR:
+#   index.json           -> {"generation": ..., "dtype": ..., "dim": ..., "count": ...}  (written last = the commit)
+#   gen-<id>/vectors.npy -> (count, dim) unit vectors, float32 or int8
+#   gen-<id>/scales.npy  -> (count,) float32 per-row scale (int8 only)
+#   gen-<id>/records.jsonl -> one {"id", "document", "metadata"} per row
+# Every write goes to a fresh generation, so a running API never sees a half-written index.
+
+# 1. Configuration
+COLLECTION_NAME = "university_rules"
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join("data", "index", COLLECTION_NAME))
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # float32 | int8 (4x smaller, ~same ranking)
+LOAD_ATTEMPTS = 3  # Generations a reader follows when ingest.py replaces them faster than it can load
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _quantize(vectors):
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def _read_header(index_dir):
+    try:
+        with open(os.path.join(index_dir, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _read_records(gen_dir):
+    with open(os.path.join(gen_dir, "records.jsonl"), "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def _read_snapshot(index_dir, header):
+    gen_dir = os.path.join(index_dir, header["generation"])
+    return Snapshot(
+        header["generation"],
+        np.load(os.path.join(gen_dir, "vectors.npy"), mmap_mode="r"),
+        np.load(os.path.join(gen_dir, "scales.npy")) if header["dtype"] == "int8" else None,
+        _read_records(gen_dir),
+    )
+
+# 2. Read Side (the API)
+class Snapshot(NamedTuple):
+    """
+    One generation, whole. LocalIndex swaps it in with a single assignment, so a search that
+    grabbed it never mixes one generation's vectors with another's records.
+    """
+    generation: Optional[str]
+    vectors: np.ndarray           # (count, dim), memory-mapped
+    scales: Optional[np.ndarray]  # (count,) for int8, else None
+    records: list
+
+EMPTY = Snapshot(None, np.zeros((0, 0), dtype=np.float32), None, [])
+
+class LocalIndex:
+    """
+    Memory-mapped, exact cosine top-k. Picks up a new generation written by ingest.py on the next query.
+    """
+
+    def __init__(self, index_dir=LOCAL_INDEX_DIR):
+        self.index_dir = index_dir
+        self.snapshot = EMPTY
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Returns the current snapshot, loading the generation ingest.py committed last if it is new.
+        """
+        header = _read_header(self.index_dir)
+        generation = header["generation"] if header else None
+        snapshot = self.snapshot
+        if generation == snapshot.generation:
+            return snapshot
+        with self._lock:
+            for _ in range(LOAD_ATTEMPTS):
+                if generation == self.snapshot.generation:
+                    return self.snapshot
+                if header is None or not header["count"]:
+                    self.snapshot = EMPTY._replace(generation=generation)
+                    return self.snapshot
+                try:
+                    snapshot = _read_snapshot(self.index_dir, header)
+                except OSError:
+                    # ingest.py committed again and removed this generation while we read it: follow the header
+                    header = _read_header(self.index_dir)
+                    generation = header["generation"] if header else None
+                    continue
+                print(f"📚 Local index loaded: {header['count']} chunks ({header['dtype']}).")
+                self.snapshot = snapshot
+                return snapshot
+            # Still mid-rewrite: keep answering from what we have and look again on the next query
+            print(f"⚠️ Local index generation {generation} vanished while loading; serving {self.snapshot.generation}.")
+            return self.snapshot
+
+    def search(self, vector, k=3):
+        _, vectors, scales, records = self.load()
+        if not records:
+            return []
+        scores = vectors @ _normalize(vector)
+        if scales is not None:
+            scores = scores * scales
+        k = min(k, len(records))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            Document(id=records[i]["id"], page_content=records[i]["document"], metadata=records[i]["metadata"])
+            for i in top
+        ]
+
+_local_index = None
+
+def get_local_index():
+    global _local_index
+    if _local_index is None:
+        _local_index = LocalIndex()
+    return _local_index
+
+# 3. Write Side (ingest.py), same interface as its pgvector BulkWriter
+class LocalWriter:
+    durable = False  # Rows reach disk in close(): ingest.py saves its manifest only after that
+
+    def __init__(self, index_dir=LOCAL_INDEX_DIR, dtype=LOCAL_INDEX_DTYPE):
+        self.index_dir = index_dir
+        self.dtype = dtype
+        self.rows = {}  # id -> (unit vector, document, metadata), in insertion order
+        self.dirty = False
+        header = _read_header(index_dir)
+        if header and header["count"]:
+            gen_dir = os.path.join(index_dir, header["generation"])
+            vectors = np.load(os.path.join(gen_dir, "vectors.npy")).astype(np.float32)
+            if header["dtype"] == "int8":
+                vectors *= np.load(os.path.join(gen_dir, "scales.npy"))[:, None]
+            for vector, record in zip(vectors, _read_records(gen_dir)):
+                self.rows[record["id"]] = (vector, record["document"], record["metadata"])
+
+    def clear(self):
+        self.rows.clear()
+        self.dirty = True
+
+    def write(self, docs, vectors):
+        for doc, vector in zip(docs, _normalize(vectors)):
+            self.rows[doc.metadata["chunk_id"]] = (vector, doc.page_content, doc.metadata)
+        self.dirty = True
+
+    def delete(self, ids):
+        for cid in ids:
+            self.rows.pop(cid, None)
+        self.dirty = bool(ids) or self.dirty
+
+    def documents(self):
+        return [Document(page_content=document, metadata={**metadata, "chunk_id": cid}) for cid, (_, document, metadata) in self.rows.items()]
+
+    def close(self):
+        if not self.dirty:
+            return
+        generation = f"gen-{uuid.uuid4().hex[:12]}"
+        gen_dir = os.path.join(self.index_dir, generation)
+        os.makedirs(gen_dir)
+
+        vectors = np.stack([row[0] for row in self.rows.values()]) if self.rows else np.zeros((0, 0), dtype=np.float32)
+        if self.dtype == "int8" and self.rows:
+            vectors, scales = _quantize(vectors)
+            np.save(os.path.join(gen_dir, "scales.npy"), scales)
+        np.save(os.path.join(gen_dir, "vectors.npy"), vectors)
+        with open(os.path.join(gen_dir, "records.jsonl"), "w", encoding="utf-8") as f:
+            for cid, (_, document, metadata) in self.rows.items():
+                f.write(json.dumps({"id": cid, "document": document, "metadata": metadata}) + "\n")
+
+        header = {"generation": generation, "dtype": self.dtype, "dim": int(vectors.shape[1]), "count": len(self.rows)}
+        tmp_path = os.path.join(self.index_dir, "index.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, os.path.join(self.index_dir, "index.json"))
+        self.dirty = False
+
+        # Old generations can go: a reader still mapping one keeps its (unlinked) file until it reloads
+        for name in os.listdir(self.index_dir):
+            if name.startswith("gen-") and name != generation:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
\ No newline at end of file
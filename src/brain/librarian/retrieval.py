@@ -0,0 +1,162 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.brain.toolbelt import metrics
+from src.brain.librarian.embeddings import get_embeddings
+from src.brain.librarian.bm25_index import get_bm25_index
+
+# 1. The Backend (The Librarian)
+#   pgvector -> Postgres via vector_index.search(), ANN knobs settable per request
+#   local    -> memory-mapped NumPy matrix via local_index (no database at all; knobs are ignored, search is exact)
+# Both are imported on first use, so importing the routers never needs a database.
+COLLECTION_NAME = "university_rules"
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "pgvector")
+
+# Hybrid search: vector + BM25 candidates, merged with reciprocal rank fusion
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 10))  # Taken from each side before fusing
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# ingest.py rewrites this stamp whenever the collection changes; every cache below (and the answer cache) is
+# dropped when it does. The API must see the same file ingest.py writes: docker-compose.yml mounts data/index for it.
+VERSION_FILE = os.getenv("RULES_VERSION_FILE", os.path.join("data", "index", f"{COLLECTION_NAME}.version"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", 1024))
+RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", 3600))  # Seconds
+
+# 2. Collection Version Stamp
+def collection_version():
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def mark_collection_changed():
+    """
+    Called by ingest.py after it writes to the collection: invalidates every retrieval cache.
+    """
+    os.makedirs(os.path.dirname(VERSION_FILE) or ".", exist_ok=True)
+    tmp_path = f"{VERSION_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp_path, VERSION_FILE)
+
+# 3. The Cache (LRU + TTL, tagged with the collection version)
+class TTLCache:
+    def __init__(self, name, max_items=RETRIEVAL_CACHE_SIZE, ttl_seconds=RETRIEVAL_CACHE_TTL):
+        self.name = name
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._items.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._sync_version(version)
+            item = self._items.get(key)
+            if item is not None and time.monotonic() - item[0] <= self.ttl_seconds:
+                self._items.move_to_end(key)
+                metrics.increment(f"{self.name}.hits")
+                return item[1]
+            self._items.pop(key, None)
+        metrics.increment(f"{self.name}.misses")
+        return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._sync_version(version)
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+embedding_cache = TTLCache("retrieval.embedding_cache")
+results_cache = TTLCache("retrieval.results_cache")
+
+def normalize_question(question):
+    # "What are the Re-Exam rules??" and "what are the re-exam rules" are the same question
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+# 4. Retrieval
+def search_vectors(vector, k=3, ef_search=None, probes=None):
+    if RETRIEVAL_BACKEND == "local":
+        from src.brain.librarian.local_index import get_local_index
+        return get_local_index().search(vector, k=k)
+    from src.brain.librarian import vector_index
+    return vector_index.search(vector, k=k, ef_search=ef_search, probes=probes)
+
+def fuse(rankings, k, rrf_k=RRF_K):
+    """
+    Reciprocal rank fusion: each list adds 1 / (rrf_k + rank) per chunk. Only ranks matter,
+    so cosine similarities and BM25 scores never have to be put on one scale.
+    """
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc_id(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+def warm_up():
+    """
+    Startup: loads the embedding model, maps the local index or reports on the pgvector ANN index.
+    """
+    get_embeddings()  # So the first question doesn't pay for loading the model
+    if not os.path.exists(VERSION_FILE):
+        print(f"⚠️ No collection version stamp at {os.path.abspath(VERSION_FILE)}: ingests won't reach this API's caches "
+              f"until their TTL ({RETRIEVAL_CACHE_TTL}s). Is the index directory mounted (RULES_VERSION_FILE)?")
+    if HYBRID_SEARCH:
+        bm25 = get_bm25_index()
+        if not os.path.exists(bm25.path):
+            print(f"⚠️ HYBRID_SEARCH is on but there is no BM25 index at {os.path.abspath(bm25.path)}: "
+                  f"searches are vector-only until ingest.py writes one (BM25_FILE).")
+        bm25.load()
+    if RETRIEVAL_BACKEND == "local":
+        from src.brain.librarian.local_index import get_local_index
+        get_local_index().load()
+    else:
+        from src.brain.librarian import vector_index
+        vector_index.check_index()
+
+def embed_question(question):
+    key = normalize_question(question)
+    version = collection_version()
+    vector = embedding_cache.get(key, version)
+    if vector is None:
+        vector = get_embeddings().embed_query(key)
+        embedding_cache.put(key, version, vector)
+    return vector
+
+def retrieve(question, k=3, ef_search=None, probes=None):
+    """
+    Top-k rule chunks for a question. Blocking (embedding + Postgres): call it from the io pool.
+    ef_search (HNSW) / probes (IVFFlat) trade recall for speed; None uses the configured default.
+    With HYBRID_SEARCH the vector hits are fused with BM25 hits, so exact codes and clause numbers rank too.
+    """
+    key = (normalize_question(question), k, ef_search, probes)
+    version = collection_version()
+    docs = results_cache.get(key, version)
+    if docs is None:
+        depth = max(k, HYBRID_CANDIDATES) if HYBRID_SEARCH else k
+        docs = search_vectors(embed_question(question), k=depth, ef_search=ef_search, probes=probes)
+        if HYBRID_SEARCH:
+            docs = fuse([docs, get_bm25_index().search(question, k=depth)], k)
+        results_cache.put(key, version, docs)
+    return list(docs)
+
+
+def doc_id(doc):
+    # Stable id of a retrieved chunk: the vector store's id, or a hash of its text
+    return getattr(doc, "id", None) or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
@@ -4,6 +4,7 @@
 # =============================================================================
 import sys
 import types
+import threading
 
 try:
     # 1. Mock 'langchain.docstore.document'
@@ -42,6 +43,9 @@ import os
 
 # Import Routers
 from src.brain.routers import rag_router, chat_router, calc_router, doctor_router, ocr_router
+from src.brain.toolbelt import metrics, executors
+from src.brain.toolbelt.llm_client import llm
+from src.brain.librarian import retrieval
 
 # Load Environment
 load_dotenv()
@@ -60,6 +64,17 @@ app.include_router(calc_router.router, prefix="/api/v1", tags=["Calculator"])
 app.include_router(doctor_router.router, prefix="/api/v1", tags=["The Doctor"])
 app.include_router(ocr_router.router, prefix="/api/v1", tags=["The Eye"])
 
+@app.on_event("startup")
+async def warm_up_retrieval():
+    # In the background: loading the embedding model and mapping the indexes must not hold up the API
+    threading.Thread(target=retrieval.warm_up, name="retrieval-warm-up", daemon=True).start()
+    doctor_router.doctor.start()  # Picks up newly published Doctor models without a restart
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    executors.shutdown_all()
+    await llm.aclose()
+
 @app.get("/")
 async def root():
     return {"status": "online", "system": "Brain", "message": "I am ready to process data."}
@@ -68,6 +83,10 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return {**metrics.snapshot(), "pools": executors.stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,5 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import pandas as pd
+import numpy as np
+import json
+import io
+import os
+from src.brain.toolbelt.executors import cpu_pool
 from src.brain.toolbelt.planner import Planner, CourseInput, SgpaResult
 
 router = APIRouter()
@@ -19,4 +26,90 @@ async def calculate_sgpa(courses: List[CourseInput]):
 
     except Exception as e:
         print(f"❌ Calculation Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 2. The Bulk Endpoint (a whole cohort, every semester, in one upload)
+# One row per course taken: usn, semester, credits, grade (name and other columns are ignored)
+BULK_INPUTS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+BULK_OUTPUTS = {"json": "application/json", "csv": "text/csv"}
+BULK_COLUMNS = ["usn", "semester", "credits", "grade"]
+
+def read_arrow(data):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=415, detail="Arrow uploads need pyarrow installed on the server. Send CSV or JSON lines instead.")
+    try:
+        return pa.ipc.open_file(pa.BufferReader(data)).read_pandas()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(pa.BufferReader(data)).read_pandas()  # Arrow streaming format
+
+def read_courses(data, kind):
+    # Runs on the CPU pool: parsing is the blocking part for large files
+    try:
+        if kind == "arrow":
+            frame = read_arrow(data)
+        elif kind == "jsonl":
+            frame = pd.read_json(io.BytesIO(data), lines=True, dtype={"usn": str, "grade": str})
+        else:
+            frame = pd.read_csv(io.BytesIO(data), dtype={"usn": str, "grade": str})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read {kind} upload: {e}")
+
+    if "semester" not in frame.columns:
+        frame["semester"] = 1  # A single semester's marks card
+    missing = [c for c in BULK_COLUMNS if c not in frame.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+    if frame.empty:
+        raise HTTPException(status_code=400, detail="The upload has no rows.")
+    numbers = frame[["semester", "credits"]].apply(pd.to_numeric, errors="coerce")
+    if numbers.isna().any().any() or (numbers % 1 != 0).any().any() or (numbers < 0).any().any():
+        raise HTTPException(status_code=400, detail="'semester' and 'credits' must hold whole, non-negative numbers (no blanks).")
+    if frame["usn"].isna().any():
+        raise HTTPException(status_code=400, detail="Every row needs a 'usn'.")
+    return pd.DataFrame({
+        "usn": frame["usn"].astype(str),
+        "semester": numbers["semester"].to_numpy(dtype=np.int64),
+        "credits": numbers["credits"].to_numpy(dtype=np.int64),
+        "grade": frame["grade"].fillna(""),
+    })
+
+def calculate_bulk(data, kind):
+    courses = read_courses(data, kind)
+    semesters, students = Planner.bulk_sgpa(courses)
+    return len(courses), semesters, students
+
+@router.post("/calculate_sgpa/bulk")
+async def calculate_sgpa_bulk(file: UploadFile = File(...), input: Optional[str] = None, format: Optional[str] = "json"):
+    """
+    SGPA per semester and CGPA per student for a whole cohort, computed column-wise.
+    The upload is CSV, JSON lines or Arrow (picked from the file extension, or input=csv|jsonl|arrow),
+    one row per course: usn, semester, credits, grade.
+    format=json returns {students, semesters}; format=csv returns one row per semester with the student's CGPA.
+    """
+    kind = input or BULK_INPUTS.get(os.path.splitext(file.filename or "")[1].lower(), "csv")
+    if kind not in set(BULK_INPUTS.values()):
+        raise HTTPException(status_code=400, detail=f"Unknown input '{kind}'. Use one of: csv, jsonl, arrow")
+    if format not in BULK_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(BULK_OUTPUTS)}")
+
+    data = await file.read()
+    rows, semesters, students = await cpu_pool.run(calculate_bulk, data, kind)
+    print(f"🧮 Bulk SGPA: {rows} courses -> {len(semesters)} semesters, {len(students)} students.")
+
+    if format == "csv":
+        report = semesters.merge(students[["usn", "cgpa"]], on="usn", how="left")
+        name = os.path.splitext(file.filename or "cohort")[0]
+        return StreamingResponse(
+            iter([report.to_csv(index=False)]),
+            media_type=BULK_OUTPUTS["csv"],
+            headers={"Content-Disposition": f'attachment; filename="{name}_sgpa.csv"'},
+        )
+    return {
+        "courses": rows,
+        "students": json.loads(students.to_json(orient="records")),
+        "semesters": json.loads(semesters.to_json(orient="records")),
+    }
\ No newline at end of file
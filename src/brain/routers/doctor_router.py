@@ -1,22 +1,66 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional, NamedTuple, Any
 import xgboost as xgb
 import pandas as pd
+import numpy as np
+import json
 import os
+import shutil
+import tempfile
+from src.brain.toolbelt.executors import cpu_pool, io_pool
+from src.brain.toolbelt import risk_table as risk
+from src.brain.toolbelt import model_registry
 
 router = APIRouter()
 
-# 1. Load the Trained Brain
-MODEL_PATH = os.path.join("src", "brain", "toolbelt", "doctor_model.json")
-doctor_model = xgb.XGBClassifier()
+# 1. Load the Trained Brain (from the model registry, hot-swapped when a new version is published)
+# The pre-registry model file is imported once as the first version
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "toolbelt", "doctor_model.json")
 
-# Load immediately if file exists
-if os.path.exists(MODEL_PATH):
-    doctor_model.load_model(MODEL_PATH)
-    print("👨‍⚕️ The Real Doctor is IN.")
+class Doctor(NamedTuple):
+    model: Any       # xgb.XGBClassifier
+    table: Any       # risk.RiskTable or None (compiled mode off / failed verification)
+
+def load_doctor(path, metadata):
+    if metadata.get("features", risk.FEATURES) != risk.FEATURES:
+        raise ValueError(f"model expects {metadata['features']}, the API sends {risk.FEATURES}")
+    model = xgb.XGBClassifier()
+    model.load_model(path)
+
+    # Compiled mode: answer every in-range patient from a lookup table instead of calling XGBoost
+    table = None
+    if risk.DOCTOR_COMPILED:
+        table = risk.RiskTable.compile(model)
+        mismatches = risk.verify(model, table, samples=risk.VERIFY_SAMPLES)
+        if mismatches:
+            print(f"⚠️ Risk table disagrees with the model on {mismatches}/{risk.VERIFY_SAMPLES} samples. Using the model directly.")
+            table = None
+    return Doctor(model, table)
+
+def warm_up_doctor(doctor):
+    # One real prediction before this version takes traffic
+    probability = doctor.model.predict_proba(pd.DataFrame([risk.LOWS], columns=risk.FEATURES))[0][1]
+    if not 0.0 <= probability <= 1.0:
+        raise ValueError(f"warm-up prediction out of range: {probability}")
+
+model_registry.import_legacy("doctor", LEGACY_MODEL_PATH, {"features": risk.FEATURES})
+doctor = model_registry.HotModel("doctor", load_doctor, warm_up_doctor)
+if doctor.refresh() is not None:
+    print(f"👨‍⚕️ The Real Doctor is IN ({doctor.active.version}).")
 else:
     print("⚠️ Doctor model not found! Did you run train_real_doctor.py?")
 
+def on_duty():
+    """
+    The version serving this request. 503 (not an untrained model) when none has been published.
+    """
+    served = doctor.active
+    if served is None:
+        raise HTTPException(status_code=503, detail="No Doctor model is available yet. Run train_real_doctor.py.")
+    return served
+
 # 2. Patient Intake Form (Updated for UCI Dataset)
 class StudentHealth(BaseModel):
     study_time: int     # 1 (<2 hrs) to 4 (>10 hrs)
@@ -26,43 +70,219 @@ class StudentHealth(BaseModel):
     health: int         # 1 (Bad) to 5 (Good)
     alcohol_daily: int  # 1 (Very Low) to 5 (Very High) <-- NEW FIELD
 
+# Advice, in priority order (first matching trigger wins)
+ADVICE_ALCOHOL = "High daily alcohol consumption is strongly linked to grade drops. Consider cutting back."
+ADVICE_FAILURES = "Past failures are a risk factor. Focus on backlog clearance."
+ADVICE_ABSENCES = "Your attendance is low. You are at risk of being detained (DX Grade)."
+ADVICE_OK = "Keep up the good work!"
+STATUS_RISK = "High Risk of Failure 🚩"
+STATUS_OK = "On Track ✅"
+
+def run_diagnosis(model, input_data):
+    # Runs on the CPU pool; XGBoost releases the GIL while it predicts
+    probability = float(model.predict_proba(input_data)[0][1]) # Confidence score
+    prediction = int(probability > 0.5)  # Same rule XGBClassifier.predict() applies
+    return prediction, probability
+
 # 3. Diagnosis Endpoint
 @router.post("/predict_burnout")
 async def predict_burnout(student: StudentHealth):
     """
     Analyzes student habits (including alcohol/health) to predict failure risk.
     """
+    served = on_duty()
+    model, risk_table = served.model
     try:
-        # Convert input to DataFrame (Must match training columns exactly)
-        input_data = pd.DataFrame([{
-            'study_time': student.study_time,
-            'failures': student.failures,
-            'absences': student.absences,
-            'free_time': student.free_time,
-            'health': student.health,
-            'alcohol_daily': student.alcohol_daily
-        }])
-
-        # Predict (0 = Safe, 1 = At Risk of G3 < 10)
-        prediction = doctor_model.predict(input_data)[0]
-        probability = doctor_model.predict_proba(input_data)[0][1] # Confidence score
+        # O(1) answer from the compiled table when the patient is inside the grid
+        probability = risk_table.lookup([getattr(student, f) for f in risk.FEATURES]) if risk_table is not None else None
+        if probability is not None:
+            prediction = int(probability > 0.5)
+        else:
+            # Convert input to DataFrame (Must match training columns exactly)
+            input_data = pd.DataFrame([{
+                'study_time': student.study_time,
+                'failures': student.failures,
+                'absences': student.absences,
+                'free_time': student.free_time,
+                'health': student.health,
+                'alcohol_daily': student.alcohol_daily
+            }])
+
+            # Predict (0 = Safe, 1 = At Risk of G3 < 10)
+            prediction, probability = await cpu_pool.run(run_diagnosis, model, input_data)
 
         # Customize advice based on the specific trigger
-        advice = "Keep up the good work!"
+        advice = ADVICE_OK
         if student.alcohol_daily > 3:
-            advice = "High daily alcohol consumption is strongly linked to grade drops. Consider cutting back."
+            advice = ADVICE_ALCOHOL
         elif student.failures > 0:
-            advice = "Past failures are a risk factor. Focus on backlog clearance."
+            advice = ADVICE_FAILURES
         elif student.absences > 10:
-            advice = "Your attendance is low. You are at risk of being detained (DX Grade)."
+            advice = ADVICE_ABSENCES
 
-        status = "High Risk of Failure 🚩" if prediction == 1 else "On Track ✅"
+        status = STATUS_RISK if prediction == 1 else STATUS_OK
         
         return {
             "diagnosis": status,
             "risk_probability": f"{round(probability * 100, 1)}%",
-            "advice": advice
+            "advice": advice,
+            "model_version": served.version
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Diagnosis failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Diagnosis failed: {str(e)}")
+
+# 4. Cohort Screening (a whole class in one model call)
+DOCTOR_BATCH_CHUNK_ROWS = int(os.getenv("DOCTOR_BATCH_CHUNK_ROWS", 5000))  # CSV rows scored (and held) at a time
+DOCTOR_SPOOL_MEMORY_MB = int(os.getenv("DOCTOR_SPOOL_MEMORY_MB", 8))          # Bigger uploads are spooled to disk
+BATCH_FORMATS = {"json": "application/json", "csv": "text/csv"}
+
+def score_rows(served, rows):
+    """
+    P(at risk) for an (n, 6) int array: the compiled table where it covers the row, one predict_proba for the rest.
+    """
+    model, risk_table = served.model
+    if risk_table is not None:
+        probabilities, covered = risk_table.lookup_many(rows)
+    else:
+        probabilities, covered = np.full(len(rows), np.nan, dtype=np.float32), np.zeros(len(rows), dtype=bool)
+    if not covered.all():
+        missing = pd.DataFrame(rows[~covered], columns=risk.FEATURES)
+        probabilities[~covered] = model.predict_proba(missing)[:, 1]
+    return probabilities
+
+def diagnose_frame(served, frame):
+    """
+    Scores a DataFrame with the StudentHealth columns. Vectorized version of /predict_burnout, same rules.
+    """
+    missing = [f for f in risk.FEATURES if f not in frame.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+    values = frame[risk.FEATURES].apply(pd.to_numeric, errors="coerce")
+    if values.isna().any().any() or (values % 1 != 0).any().any():
+        raise HTTPException(status_code=400, detail="Every StudentHealth column must hold whole numbers (no blanks).")
+    rows = values.to_numpy(dtype=np.int64)
+
+    probabilities = score_rows(served, rows)
+    at_risk = probabilities > 0.5
+    study_time, failures, absences, free_time, health, alcohol_daily = rows.T
+    result = pd.DataFrame(rows, columns=risk.FEATURES)
+    result["risk_probability"] = np.round(probabilities.astype(np.float64), 4)
+    result["at_risk"] = at_risk.astype(int)
+    result["diagnosis"] = np.where(at_risk, STATUS_RISK, STATUS_OK)
+    result["advice"] = np.select(
+        [alcohol_daily > 3, failures > 0, absences > 10],
+        [ADVICE_ALCOHOL, ADVICE_FAILURES, ADVICE_ABSENCES],
+        default=ADVICE_OK,
+    )
+    return result
+
+def batch_response(served, result):
+    return {
+        "model_version": served.version,
+        "count": len(result),
+        "at_risk": int(result["at_risk"].sum()),
+        "results": json.loads(result.to_json(orient="records", force_ascii=False)),
+    }
+
+def check_format(format):
+    if format not in BATCH_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(BATCH_FORMATS)}")
+
+@router.post("/predict_burnout/batch")
+async def predict_burnout_batch(students: List[StudentHealth], format: Optional[str] = "json"):
+    """
+    Screens a JSON array of students at once. format=csv returns the same rows as a CSV file.
+    """
+    check_format(format)
+    served = on_duty()
+    frame = pd.DataFrame([student.model_dump() for student in students], columns=risk.FEATURES)
+    result = await cpu_pool.run(diagnose_frame, served, frame)
+    if format == "csv":
+        return StreamingResponse(iter([result.to_csv(index=False)]), media_type=BATCH_FORMATS["csv"], headers={"X-Model-Version": served.version})
+    return batch_response(served, result)
+
+def spool_upload(upload):
+    # Our own copy of the upload: FastAPI may close UploadFile as soon as the handler returns,
+    # while a streamed response is still reading the CSV
+    spool = tempfile.SpooledTemporaryFile(max_size=DOCTOR_SPOOL_MEMORY_MB * 1024 * 1024)
+    shutil.copyfileobj(upload, spool, 1 << 20)
+    spool.seek(0)
+    return spool
+
+def read_chunk(reader):
+    # Runs on the CPU pool: parsing the next CSV block is blocking work.
+    # A malformed row can sit in any block, not just the first one.
+    try:
+        return next(reader)
+    except StopIteration:
+        return None
+    except (ValueError, pd.errors.ParserError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read CSV: {str(e).strip()}")  # pandas ends some messages with a newline
+
+@router.post("/predict_burnout/batch_csv")
+async def predict_burnout_batch_csv(file: UploadFile = File(...), format: Optional[str] = "csv"):
+    """
+    Screens a CSV upload with the StudentHealth columns.
+    format=csv (default) streams results back block by block, so 100k-row files are never held in memory;
+    format=json returns one JSON document.
+    """
+    check_format(format)
+    served = on_duty()  # The whole file is scored by this one version, even if a new one lands meanwhile
+    spool = await io_pool.run(spool_upload, file.file)
+    streaming = False  # From here on, the response's generator closes the spool
+    try:
+        try:
+            reader = pd.read_csv(spool, chunksize=DOCTOR_BATCH_CHUNK_ROWS)
+        except (ValueError, pd.errors.ParserError) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read CSV: {str(e).strip()}")
+        first = await cpu_pool.run(read_chunk, reader)
+        if first is None:
+            raise HTTPException(status_code=400, detail="The CSV has no rows.")
+        # Score the first block before answering, so a bad file still gets a proper 400
+        first_result = await cpu_pool.run(diagnose_frame, served, first)
+
+        if format == "json":
+            results = [first_result]
+            while (chunk := await cpu_pool.run(read_chunk, reader)) is not None:
+                results.append(await cpu_pool.run(diagnose_frame, served, chunk))
+            return batch_response(served, pd.concat(results, ignore_index=True))
+
+        async def generate():
+            try:
+                yield first_result.to_csv(index=False)
+                while True:
+                    try:
+                        chunk = await cpu_pool.run(read_chunk, reader)
+                        if chunk is None:
+                            return
+                        result = await cpu_pool.run(diagnose_frame, served, chunk)
+                    except HTTPException as e:
+                        # Headers are gone already: stop with a marker row instead of a truncated file
+                        yield f"# error: {e.detail}\n"
+                        return
+                    yield result.to_csv(index=False, header=False)
+            finally:
+                spool.close()
+
+        name = os.path.splitext(file.filename or "students")[0]
+        response = StreamingResponse(
+            generate(),
+            media_type=BATCH_FORMATS["csv"],
+            headers={"Content-Disposition": f'attachment; filename="{name}_screened.csv"', "X-Model-Version": served.version},
+        )
+        streaming = True
+        return response
+    finally:
+        if not streaming:
+            spool.close()
+
+# 5. Model Info
+@router.get("/doctor/model")
+async def doctor_model_info():
+    """
+    The version being served, its metadata (features, metrics, hash, ...) and every version in the registry.
+    """
+    return doctor.stats()
\ No newline at end of file
@@ -1,13 +1,24 @@
 import sys
 import os
+import io
 import re
-import shutil
+import json
+import asyncio
+import hashlib
+import zipfile
 import tempfile
 import pandas as pd
 import logging
 import types
 import numpy as np
+from typing import List, NamedTuple, Optional
+from contextlib import contextmanager
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from src.brain.toolbelt import metrics, executors
+from src.brain.toolbelt.executors import cpu_pool
+from src.brain.toolbelt.scan_cache import ScanCache
 
 # 1. ZERO-HOUR PATCH
 try:
@@ -31,7 +42,8 @@ try:
 except: pass
 
 # 2. SAFE IMPORTS
-from paddleocr import PaddleOCR 
+# PaddleOCR (and OpenCV with it) is imported only when a scan actually needs OCR,
+# so digital-PDF-only deployments never load it.
 import fitz 
 
 router = APIRouter()
@@ -59,15 +71,38 @@ def get_course_info(code):
         return entry
     return {"name": "Unknown", "credits": 3}
 
+# Bump when the parser changes how a card is read, so old cached scans are re-read
+PARSER_VERSION = "5"
+
+def registry_fingerprint():
+    # Any edit to COURSE_DB (names/credits) changes this and invalidates cached scans
+    payload = json.dumps(COURSE_DB, sort_keys=True) + PARSER_VERSION
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
 # 4. LAZY LOADER
-_ocr_engine = None
-def get_ocr_engine():
-    global _ocr_engine
-    if _ocr_engine is None:
-        print("👁️ Waking up the Eye...")
+# Set OCR_ENABLED=0 on nodes that only ever receive digital PDFs
+OCR_ENABLED = os.getenv("OCR_ENABLED", "1") == "1"
+
+# Every card is read with the fast profile first and escalated to accurate only when needed
+OCR_PROFILES = {
+    # No angle classifier, smaller detection input. Point OCR_FAST_DET_MODEL_DIR at a lighter det model if you have one.
+    "fast": {"use_angle_cls": False, "lang": "en", "det_limit_side_len": 736},
+    # The original setup
+    "accurate": {"use_angle_cls": True, "lang": "en"},
+}
+if os.getenv("OCR_FAST_DET_MODEL_DIR"):
+    OCR_PROFILES["fast"]["det_model_dir"] = os.getenv("OCR_FAST_DET_MODEL_DIR")
+OCR_DEFAULT_PROFILE = os.getenv("OCR_DEFAULT_PROFILE", "fast")
+OCR_ESCALATION = os.getenv("OCR_ESCALATION", "1") == "1"
+
+_ocr_engines = {}
+def get_ocr_engine(profile="accurate"):
+    if profile not in _ocr_engines:
+        print(f"👁️ Waking up the Eye ({profile})...")
+        from paddleocr import PaddleOCR
         logging.getLogger("ppocr").setLevel(logging.ERROR)
-        _ocr_engine = PaddleOCR(use_angle_cls=True, lang='en')
-    return _ocr_engine
+        _ocr_engines[profile] = PaddleOCR(**OCR_PROFILES[profile])
+    return _ocr_engines[profile]
 
 # 5. EXTRACTOR
 def extract_any_text(obj, depth=0, max_depth=10):
@@ -83,6 +118,64 @@ def extract_any_text(obj, depth=0, max_depth=10):
         for value in obj.__dict__.values(): texts.extend(extract_any_text(value, depth + 1))
     return texts
 
+class OcrTokens(NamedTuple):
+    """
+    Everything the Eye read from a page, as parallel arrays (token i is boxes[i], texts[i], confs[i]).
+    """
+    boxes: np.ndarray  # (N, 4) float32: x0, y0, x1, y1 in pixels
+    texts: list        # N strings
+    confs: np.ndarray  # (N,) float32, 0..1
+    info: Optional[dict] = None  # How the page was read (dpi, crop, retry); set by the OCR jobs
+
+    @staticmethod
+    def empty():
+        return OcrTokens(np.zeros((0, 4), dtype=np.float32), [], np.zeros(0, dtype=np.float32))
+
+    @staticmethod
+    def from_words(words):
+        # Words without geometry (NaN boxes): only the token-order parser can use these
+        return OcrTokens(np.full((len(words), 4), np.nan, dtype=np.float32), list(words), np.ones(len(words), dtype=np.float32))
+
+def _polys_to_boxes(polys):
+    # (N, 4, 2) quadrilaterals -> (N, 4) axis-aligned boxes in one vectorized step
+    pts = np.asarray(polys, dtype=np.float32).reshape(len(polys), -1, 2)
+    return np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1)
+
+def extract_ocr_tokens(result):
+    """
+    Pulls (box, text, confidence) straight out of a PaddleOCR result.
+    Understands both the 2.x list format and the 3.x OCRResult dicts; falls back to
+    extract_any_text (no geometry) for anything else.
+    """
+    boxes, texts, confs = [], [], []
+    try:
+        for page in (result or []):
+            if page is None:
+                continue
+            if hasattr(page, "keys") and "rec_texts" in page:
+                # 3.x: {'rec_texts': [...], 'rec_scores': [...], 'rec_boxes' / 'rec_polys': ...}
+                page_texts = list(page["rec_texts"])
+                if not page_texts: continue
+                rec_boxes = page.get("rec_boxes")
+                page_boxes = np.asarray(rec_boxes, dtype=np.float32) if rec_boxes is not None and len(rec_boxes) else _polys_to_boxes(page["rec_polys"])
+                boxes.append(page_boxes.reshape(-1, 4))
+                texts.extend(page_texts)
+                confs.append(np.asarray(page["rec_scores"], dtype=np.float32))
+            else:
+                # 2.x: [[poly, (text, score)], ...]
+                lines = [line for line in page if line]
+                if not lines: continue
+                boxes.append(_polys_to_boxes([line[0] for line in lines]))
+                texts.extend(line[1][0] for line in lines)
+                confs.append(np.asarray([line[1][1] for line in lines], dtype=np.float32))
+    except (TypeError, KeyError, IndexError, ValueError):
+        # Unknown layout: keep the words, lose the geometry (parse_table will then bail out)
+        return OcrTokens.from_words(extract_any_text(result))
+
+    if not texts:
+        return OcrTokens.empty()
+    return OcrTokens(np.concatenate(boxes), [str(t) for t in texts], np.concatenate(confs))
+
 # 6. METADATA
 def extract_student_details(text_list):
     usn = "Unknown"
@@ -121,26 +214,29 @@ def parse_text_stream(text_list):
     return subjects
 
 def finalize_subject(sub_data, subjects_list):
-    code = sub_data['code']
-    info = get_course_info(code) # Will always be a dict now
-    
     total_marks = max(sub_data['numbers']) if sub_data['numbers'] else 0
+    subjects_list.append(make_subject(sub_data['code'], total_marks, sub_data['result']))
+
+def make_subject(code, total_marks, result=None, internal=None, external=None):
+    info = get_course_info(code) # Will always be a dict now
     
     # Lab Patch
     is_lab = "LAB" in info['name'] or "L" in code[3:4]
     if is_lab and 40 <= total_marks <= 50: total_marks = 99 
         
-    result = sub_data['result'] or ('P' if total_marks >= 35 else 'F')
+    result = result or ('P' if total_marks >= 35 else 'F')
     points = get_grade_points(total_marks, result)
     
-    subjects_list.append({
+    return {
         "code": code,
         "name": info['name'],
         "credits": info['credits'],
         "grade": result,
+        "internal": internal,
+        "external": external,
         "total_marks": total_marks,
         "earned_points": points * info['credits']
-    })
+    }
 
 def get_grade_points(total_marks, result_status):
     if result_status == 'F': return 0
@@ -155,72 +251,763 @@ def get_grade_points(total_marks, result_status):
     elif total >= 40: return 4
     else: return 0
 
+# 7B. GEOMETRY PARSER (Rebuilds the table from OCR boxes instead of token order)
+CODE_PATTERN = re.compile(r'^(B[A-Z]{2,}\d{3}[A-Z]?)\b')
+HEADER_WORDS = {
+    "internal": ("INTERNAL", "CIE"),
+    "external": ("EXTERNAL", "SEE"),
+    "total": ("TOTAL",),
+    "result": ("RESULT",),
+}
+MARK_COLUMNS = ("internal", "external", "total")
+
+def cluster_rows(boxes):
+    """
+    Labels each token with a row id: tokens whose vertical centres are closer than
+    half a text line belong to the same row.
+    """
+    yc = (boxes[:, 1] + boxes[:, 3]) / 2
+    line_height = max(float(np.median(boxes[:, 3] - boxes[:, 1])), 1.0)
+    order = np.argsort(yc, kind="stable")
+    breaks = np.diff(yc[order]) > 0.5 * line_height
+    rows = np.empty(len(yc), dtype=np.int32)
+    rows[order] = np.concatenate(([0], np.cumsum(breaks)))
+    return rows
+
+def find_columns(texts, xc, yc, table_top):
+    # x-centre of each header above the first subject row (topmost occurrence wins)
+    anchors = {}
+    for i in np.argsort(yc, kind="stable"):
+        if yc[i] >= table_top: break
+        words = texts[i].split()
+        first_word = words[0].strip(':.') if words else ""
+        for column, names in HEADER_WORDS.items():
+            if column not in anchors and first_word in names:
+                anchors[column] = xc[i]
+    return anchors
+
+def split_marks(values):
+    """
+    Positional fallback when there are no headers: VTU rows read internal, external, total.
+    """
+    for i in range(len(values) - 2):
+        if values[i] + values[i + 1] == values[i + 2]:
+            return values[i], values[i + 1], values[i + 2]
+    if len(values) >= 3: return values[0], values[1], values[2]
+    if len(values) == 2: return values[0], values[1], values[0] + values[1]
+    if len(values) == 1: return None, None, values[0]
+    return None, None, 0
+
+def parse_table(tokens):
+    """
+    Rebuilds the subject table (code, internal, external, total, result) from token geometry.
+    Returns [] when the tokens carry no usable boxes, so callers can fall back to parse_text_stream.
+    """
+    if not tokens.texts or np.isnan(tokens.boxes).any():
+        return []
+
+    texts = [t.strip().upper() for t in tokens.texts]
+    boxes = tokens.boxes
+    xc = (boxes[:, 0] + boxes[:, 2]) / 2
+    yc = (boxes[:, 1] + boxes[:, 3]) / 2
+    rows = cluster_rows(boxes)
+
+    # One pass over the tokens to classify them; everything after is array work per row
+    values = np.array([int(t) if t.isdigit() and int(t) <= 100 else -1 for t in texts])
+    is_mark = values >= 0
+    is_result = np.array([t in ('P', 'F') for t in texts])
+    codes = [CODE_PATTERN.match(t) for t in texts]
+
+    code_rows = [i for i, m in enumerate(codes) if m]
+    if not code_rows:
+        return []
+    anchors = find_columns(texts, xc, yc, table_top=min(yc[i] for i in code_rows))
+    mark_columns = [c for c in MARK_COLUMNS if c in anchors]
+    use_headers = len(mark_columns) >= 2
+    if use_headers:
+        column_x = np.array([anchors[c] for c in mark_columns])
+
+    subjects = []
+    seen = set()
+    for i in np.argsort(yc, kind="stable"):
+        if not codes[i]: continue
+        code = codes[i].group(1)
+        if code in seen: continue
+        seen.add(code)
+
+        in_row = (rows == rows[i]) & (xc > xc[i])  # Marks sit to the right of the code
+        mark_idx = np.flatnonzero(in_row & is_mark)
+        mark_idx = mark_idx[np.argsort(xc[mark_idx], kind="stable")]
+        result_idx = np.flatnonzero(in_row & is_result)
+        result = texts[result_idx[0]] if len(result_idx) else None
+
+        marks = {}
+        if use_headers and len(mark_idx):
+            # Each number goes to the header it sits under
+            nearest = np.abs(xc[mark_idx, None] - column_x[None, :]).argmin(axis=1)
+            for idx, col in zip(mark_idx, nearest):
+                marks.setdefault(mark_columns[col], int(values[idx]))
+
+        if len(marks) >= 2 or "total" in marks:
+            internal, external = marks.get("internal"), marks.get("external")
+            total = marks.get("total", (internal or 0) + (external or 0))
+        else:
+            internal, external, total = split_marks([int(v) for v in values[mark_idx]])
+
+        subjects.append(make_subject(code, total, result, internal, external))
+    return subjects
+
+# 8. SCAN PIPELINE (Shared by the single and batch endpoints)
+# Uploads are read straight from memory. Only files above this size are spilled to a temp file,
+# so huge PDFs are not copied into every page job sent to the workers.
+SPILL_BYTES = int(os.getenv("OCR_SPILL_MB", 32)) * 1024 * 1024
+
+def save_upload(tmpdir, filename, data):
+    file_path = os.path.join(tmpdir, os.path.basename(filename) or "upload")
+    with open(file_path, "wb") as buffer:
+        buffer.write(data)
+    return file_path
+
+@contextmanager
+def upload_source(filename, data):
+    """
+    Yields what the pipeline reads from: the upload bytes themselves, or a temp file path for very large uploads.
+    """
+    if len(data) <= SPILL_BYTES:
+        yield data
+        return
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdir:
+        yield save_upload(tmpdir, filename, data)
+
+def open_pdf(source):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def decode_image(source):
+    # Decode in memory; cv2 hands back BGR, which is what PaddleOCR expects
+    import cv2
+    raw = np.frombuffer(source, dtype=np.uint8) if isinstance(source, (bytes, bytearray)) else np.fromfile(source, dtype=np.uint8)
+    img = cv2.imdecode(raw, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+def pixmap_to_array(pix):
+    # View over MuPDF's pixel buffer (no PNG encode/decode), then RGB -> BGR for PaddleOCR
+    import cv2
+    rgb = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width * pix.n]
+    return cv2.cvtColor(rgb.reshape(pix.height, pix.width, pix.n), cv2.COLOR_RGB2BGR)
+
+def read_digital_page(page):
+    # Words with their coordinates, so the geometry parser sees the real table layout
+    words = page.get_text("words")
+    if not words:
+        return OcrTokens.empty()
+    boxes = np.array([w[:4] for w in words], dtype=np.float32)
+    return OcrTokens(boxes, [w[4] for w in words], np.ones(len(words), dtype=np.float32))
+
+def ocr_required(filename):
+    if not OCR_ENABLED:
+        raise HTTPException(status_code=503, detail=f"{filename} needs OCR, which is disabled on this server. Upload a digital PDF instead.")
+
+def plan_scan(filename, source):
+    """
+    Decides how a file gets read. Returns (method, tokens, ocr_jobs):
+    digital PDFs are read right here (no OCR engine involved at all),
+    everything else becomes one OCR job per page.
+    """
+    if not filename.lower().endswith('.pdf'):
+        ocr_required(filename)
+        return "OCR-Image", None, [(ocr_image, (source,))]
+
+    doc = open_pdf(source)
+    try:
+        # FAST PATH: Check for Digital Text (on every page)
+        pages = [read_digital_page(page) for page in doc]
+
+        if sum(len(text) for page in pages for text in page.texts) > 100:
+            print("⚡ Fast Path: Digital PDF detected.")
+            return "Digital-PDF", merge_pages(pages), []
+
+        ocr_required(filename)
+        print(f"🐢 Slow Path: Scanned PDF detected ({doc.page_count} page(s), High Res).")
+        return "OCR-PDF", None, [(ocr_pdf_page, page_source(doc, source, page_no)) for page_no in range(doc.page_count)]
+    finally:
+        doc.close()
+
+def page_source(doc, source, page_no):
+    """
+    (source, page_no) for one page job, i.e. what gets pickled to an OCR worker.
+    A spilled upload is a file the worker can open itself, so only its path travels.
+    Upload bytes are cut down to a one-page PDF, so an N-page card doesn't send the whole file N times.
+    """
+    if not isinstance(source, (bytes, bytearray)) or doc.page_count == 1:
+        return source, page_no
+    single = fitz.open()
+    try:
+        single.insert_pdf(doc, from_page=page_no, to_page=page_no)
+        return single.tobytes(), 0
+    finally:
+        single.close()
+
+# 8B. PREPROCESSING (Fewer pixels in, same marks out)
+TARGET_PAGE_PX = int(os.getenv("OCR_TARGET_PAGE_PX", 2000))  # Long side of a rendered page
+MIN_DPI, MAX_DPI = 110, 200
+RETRY_DPI = int(os.getenv("OCR_RETRY_DPI", 300))
+MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", 2000))  # Phone photos are often 4000px+
+MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", 0.85))
+ROI_HEADROOM = 0.15  # Page height kept above the table: the student name and USN live there
+
+def pick_dpi(page):
+    # Enough resolution for TARGET_PAGE_PX on the long side, whatever the paper size
+    long_side_pt = max(page.rect.width, page.rect.height)
+    return int(np.clip(TARGET_PAGE_PX * 72 / long_side_pt, MIN_DPI, MAX_DPI))
+
+def downscale(img, max_side=MAX_IMAGE_SIDE):
+    import cv2
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1: return img
+    return cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+def find_table_region(img):
+    """
+    Returns (top, bottom) pixel rows of the ruled marks table, or None if no table rules are visible.
+    A table rule is a pixel row that is more than half ink.
+    """
+    gray = img[:, :, 1] if img.ndim == 3 else img  # Green channel is a good enough luminance
+    row_ink = (gray < 128).mean(axis=1)
+    rules = np.flatnonzero(row_ink > 0.5)
+    if len(rules) < 2 or rules[-1] - rules[0] < 0.1 * img.shape[0]:
+        return None
+    return int(rules[0]), int(rules[-1])
+
+def table_bounds(img):
+    """
+    (top, bottom) pixel rows of the table crop: the ruled table plus some headroom, or None to keep the whole page.
+    """
+    region = find_table_region(img)
+    if region is None:
+        return None
+    h = img.shape[0]
+    top = max(0, int(region[0] - ROI_HEADROOM * h))
+    bottom = min(h, int(region[1] + 0.02 * h))
+    if top == 0 and bottom == h:
+        return None
+    return top, bottom
+
+def crop_to_table(img):
+    # Drops the letterhead/logo above and the signatures/footer below the table. Returns a view, not a copy.
+    bounds = table_bounds(img)
+    if bounds is None:
+        return img, False
+    return img[bounds[0]:bounds[1]], True
+
+def confident(tokens):
+    return bool(tokens.texts) and float(tokens.confs.mean()) >= MIN_CONFIDENCE
+
+def ocr_array(img, profile=OCR_DEFAULT_PROFILE):
+    return extract_ocr_tokens(get_ocr_engine(profile).ocr(img))
+
+def read_region(img, retry, profile, region="table"):
+    """
+    OCRs the table crop of img with `profile`. While the engine is unsure it escalates:
+    same crop with the accurate profile, then retry() (full page, higher resolution) with accurate.
+    region="header" reads only what the table crop leaves out above the table (see escalation_reasons).
+    Returns (tokens, info).
+    """
+    if region == "header":
+        bounds = table_bounds(img)
+        tokens = ocr_array(img[:bounds[0]], profile) if bounds and bounds[0] > 0 else OcrTokens.empty()
+        return tokens, {"region": "header", "cropped": True, "retried": False, "profile": profile, "escalated": True}
+    crop, cropped = crop_to_table(img)
+    tokens, used = ocr_array(crop, profile), profile
+    if not confident(tokens) and profile != "accurate":
+        tokens, used = ocr_array(crop, "accurate"), "accurate"
+    if confident(tokens):
+        return tokens, {"region": "table", "cropped": cropped, "retried": False, "profile": used, "escalated": used != profile}
+    return ocr_array(retry(), "accurate"), {"region": "table", "cropped": False, "retried": True, "profile": "accurate", "escalated": profile != "accurate"}
+
+def ocr_image(source, profile=OCR_DEFAULT_PROFILE, region="table"):
+    original = decode_image(source)
+    tokens, info = read_region(downscale(original), retry=lambda: original, profile=profile, region=region)
+    return tokens._replace(info={"dpi": None, **info})
+
+def ocr_pdf_page(source, page_no, profile=OCR_DEFAULT_PROFILE, region="table"):
+    # Each page is opened, rendered and read independently so pages can run in parallel
+    doc = open_pdf(source)
+    try:
+        page = doc.load_page(page_no)
+        dpi = pick_dpi(page)
+        render = lambda at_dpi: pixmap_to_array(page.get_pixmap(dpi=at_dpi, alpha=False))
+        tokens, info = read_region(render(dpi), retry=lambda: render(RETRY_DPI), profile=profile, region=region)
+    finally:
+        doc.close()
+    return tokens._replace(info={"dpi": RETRY_DPI if info["retried"] else dpi, **info})
+
+def with_profile(jobs, profile):
+    # Same page jobs, forced onto another OCR profile
+    return [(func, args + (profile,)) for func, args in jobs]
+
+def header_job(jobs):
+    # The first page's header (USN + name), read with the accurate profile
+    func, args = jobs[0]
+    return func, args + ("accurate", "header")
+
+def escalation_reasons(tokens):
+    """
+    Document-level check after the fast pass. Returns which second reads are worth paying for:
+      "table"  -> the engine was unsure or no subjects came out: re-read the same crops with the accurate profile
+      "header" -> no USN: the USN and name sit above the table, outside the crop, so re-reading the crop
+                  cannot find them. Read the first page above the crop instead.
+    """
+    reads = (tokens.info or {}).get("pages", [])
+    if not OCR_ESCALATION or not reads:
+        return set()
+    reasons = set()
+    table_reads = [read for read in reads if read.get("region") != "header"]
+    if any(read["profile"] != "accurate" for read in table_reads) and (not confident(tokens) or not read_subjects(tokens)):
+        reasons.add("table")
+    usn, _ = extract_student_details(tokens.texts)
+    already_read = any(read.get("region") == "header" for read in reads)
+    if usn == "Unknown" and table_reads and table_reads[0]["cropped"] and not already_read:
+        reasons.add("header")
+    return reasons
+
+def escalation_jobs(jobs, reasons):
+    # The header goes first, so merge_pages stacks it above the table like on paper
+    return ([header_job(jobs)] if "header" in reasons else []) + (with_profile(jobs, "accurate") if "table" in reasons else [])
+
+def apply_escalation(tokens, second, reasons):
+    # An accurate table re-read replaces the fast pages; a header read alone goes on top of them
+    return second if "table" in reasons else merge_pages([second, tokens])
+
+def profile_label(tokens, escalated):
+    reads = (tokens.info or {}).get("pages", [])
+    if not reads: return None
+    if escalated or any(read["escalated"] for read in reads):
+        return f"{OCR_DEFAULT_PROFILE} -> accurate"
+    return reads[0]["profile"]
+
+def merge_pages(page_tokens):
+    """
+    Stacks the pages vertically, in page order, so a table that continues onto the next page still lines up.
+    """
+    boxes, texts, confs = [], [], []
+    reads = []
+    for page in page_tokens:
+        # Already merged tokens (e.g. a header read stacked on a whole card) bring their page reads along
+        if page.info:
+            reads.extend(page.info["pages"] if "pages" in page.info else [page.info])
+    offset = 0.0
+    for page in page_tokens:
+        if not page.texts: continue
+        page_boxes = page.boxes.copy()
+        page_boxes[:, [1, 3]] += offset
+        if not np.isnan(page_boxes).any():
+            offset = float(page_boxes[:, 3].max()) + 1.0
+        boxes.append(page_boxes)
+        texts.extend(page.texts)
+        confs.append(page.confs)
+    if not texts:
+        return OcrTokens.empty()._replace(info={"pages": reads} if reads else None)
+    return OcrTokens(np.concatenate(boxes), texts, np.concatenate(confs), {"pages": reads} if reads else None)
+
+def record_reads(tokens, label):
+    for read in (tokens.info or {}).get("pages", []):
+        metrics.increment("ocr.pages")
+        metrics.increment(f"ocr.pages.profile.{read['profile']}")
+        if read["cropped"]: metrics.increment("ocr.pages.cropped")
+        if read["retried"]: metrics.increment("ocr.pages.retried")
+        if read["escalated"]: metrics.increment("ocr.pages.escalated")
+        if read.get("region") == "header": metrics.increment("ocr.pages.header")
+    if label:
+        metrics.increment("ocr.documents")
+        if "->" in label: metrics.increment("ocr.documents.escalated")
+
+def read_subjects(tokens):
+    # Geometry first; token order only when there are no usable boxes or no table was found
+    return parse_table(tokens) or parse_text_stream(tokens.texts)
+
+def build_result(method, tokens, escalated=False):
+    label = profile_label(tokens, escalated)
+    record_reads(tokens, label)
+    if label:
+        method = f"{method} ({label})"
+    if not tokens.texts:
+        return {"status": "error", "detail": "No text found"}
+
+    # Parse
+    usn, name = extract_student_details(tokens.texts)
+    subjects = read_subjects(tokens)
+    
+    total_credits = sum(s['credits'] for s in subjects)
+    total_points = sum(s['earned_points'] for s in subjects)
+    sgpa = round(total_points / total_credits, 2) if total_credits > 0 else 0.0
+
+    return {
+        "status": "success",
+        "method": method,
+        "student_name": name,
+        "usn": usn,
+        "sgpa": sgpa,
+        "subjects": subjects
+    }
+
+def error_detail(e):
+    return e.detail if isinstance(e, HTTPException) else f"Processing error: {str(e)}"
+
+# 9. WORKER POOL (One preloaded PaddleOCR per process)
+# Size it to the number of physical cores you can spare. Each worker holds its own model (~500 MB).
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+MAX_BATCH_FILES = int(os.getenv("OCR_MAX_BATCH_FILES", 500))
+MAX_BATCH_BYTES = int(os.getenv("OCR_MAX_BATCH_MB", 512)) * 1024 * 1024  # Uncompressed, all files of one batch together
+MAX_ZIP_ENTRIES = int(os.getenv("OCR_MAX_ZIP_ENTRIES", 2000))           # Directory entries per archive, scannable or not
+SCAN_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg')
+
+def _init_ocr_worker():
+    # Pay the default model load once per worker, not on its first card. The accurate profile is only
+    # for escalations: preloading it would double every worker's RSS, so it loads on a worker's first one.
+    get_ocr_engine(OCR_DEFAULT_PROFILE)
+
+ocr_pool = executors.create_pool(
+    "ocr",
+    kind="process",
+    max_workers=OCR_WORKERS,
+    max_queue=int(os.getenv("OCR_QUEUE", 4 * OCR_WORKERS)),
+    initializer=_init_ocr_worker,
+)
+
+def _plan_job(filename, data):
+    # Batch helper for the cpu pool. Never raises: errors are reported per file.
+    try:
+        return plan_scan(filename, data), None
+    except Exception as e:
+        return None, error_detail(e)
+
+def _ocr_job(func, args):
+    # Batch helper for the ocr pool. Never raises: errors are reported per file.
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, error_detail(e)
+
+async def read_job(lease, job):
+    # A crashed worker (the pool's 503) fails the file this page belongs to, not the whole batch
+    try:
+        return await lease.execute(_ocr_job, *job)
+    except HTTPException as e:
+        return None, e.detail
+
+async def read_files(file_jobs):
+    """
+    Reads the pages of many files in one pass over the OCR pool.
+    Takes {i: page_jobs}, returns {i: (tokens, error)}.
+    """
+    flat = [(i, job) for i, jobs in file_jobs.items() for job in jobs]
+    if not flat:
+        return {}
+    with ocr_pool.admit(len(flat)) as lease:
+        page_results = await asyncio.gather(*[read_job(lease, job) for _, job in flat])
+    pages = {}
+    for (i, _), page in zip(flat, page_results):
+        pages.setdefault(i, []).append(page)
+
+    reads = {}
+    for i, file_pages in pages.items():
+        errors = [error for _, error in file_pages if error]
+        reads[i] = (None, errors[0]) if errors else (merge_pages([tokens for tokens, _ in file_pages]), None)
+    return reads
+
+async def read_pages(lease, jobs):
+    # Every page is submitted at once; the lease lets at most its slots run at a time
+    return merge_pages(await asyncio.gather(*[lease.execute(func, *args) for func, args in jobs]))
+
+async def read_document(jobs):
+    # Fast pass over every page, then one accurate pass if the result is not convincing
+    with ocr_pool.admit(len(jobs)) as lease:
+        tokens = await read_pages(lease, jobs)
+        reasons = escalation_reasons(tokens)
+        if not reasons:
+            return tokens, False
+        print(f"🔎 Fast read not convincing ({', '.join(sorted(reasons))}), escalating to the accurate profile.")
+        return apply_escalation(tokens, await read_pages(lease, escalation_jobs(jobs, reasons)), reasons), True
+
+def check_batch_size(files, size):
+    if files > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"Batch too large ({files} files, max {MAX_BATCH_FILES})")
+    if size > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=413, detail=f"Batch too large ({size // (1024 * 1024)} MB uncompressed, max {MAX_BATCH_BYTES // (1024 * 1024)} MB)")
+
+def expand_uploads(filename, data, files=0, size=0):
+    """
+    Returns [(filename, bytes)] for every scannable file. Zip archives are unpacked in memory, but only after
+    their directory shows that they fit in the batch on top of the `files`/`size` already accepted.
+    A zip bomb or a zip of thousands of entries is turned away before a single entry is inflated.
+    """
+    if not filename.lower().endswith('.zip'):
+        check_batch_size(files + 1, size + len(data))
+        return [(filename, data)]
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        infos = archive.infolist()
+        if len(infos) > MAX_ZIP_ENTRIES:
+            raise HTTPException(status_code=413, detail=f"{filename} has too many entries ({len(infos)}, max {MAX_ZIP_ENTRIES})")
+        entries = [
+            info for info in infos
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/') and info.filename.lower().endswith(SCAN_EXTENSIONS)
+        ]
+        # file_size is what the archive declares; zipfile never inflates an entry past it (a lying entry fails its CRC)
+        check_batch_size(files + len(entries), size + sum(info.file_size for info in entries))
+        return [(info.filename, archive.read(info)) for info in entries]
+
+# 10. STREAMING (NDJSON / SSE, one event per finished page)
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def format_event(fmt, event, payload):
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"event": event, **payload}) + "\n"
+
+async def _run_page(page_no, future):
+    try:
+        return page_no, await future, None
+    except Exception as e:
+        return page_no, OcrTokens.empty(), error_detail(e)
+
+async def stream_pages(fmt, lease, jobs, page_tokens, profile):
+    pending = [
+        _run_page(page_no, lease.execute(func, *args))
+        for page_no, (func, args) in enumerate(jobs)
+    ]
+    for next_page in asyncio.as_completed(pending):
+        page_no, page, error = await next_page
+        page_tokens[page_no] = page
+        if error:
+            yield format_event(fmt, "page", {"page": page_no + 1, "profile": profile, "status": "error", "detail": error})
+        else:
+            yield format_event(fmt, "page", {"page": page_no + 1, "profile": profile, "status": "success", "subjects": read_subjects(page)})
+
+async def release_leases(*leases):
+    # async so it runs on the event loop, where pool slots are counted
+    for lease in leases:
+        lease.release()
+
+async def stream_scan(filename, data, fmt, cpu_lease, ocr_lease):
+    """
+    Yields a 'page' event with that page's subjects as soon as each page is read,
+    then a final 'result' event with the merged card. If the fast read gets escalated,
+    an 'escalate' event is followed by a second round of 'page' events.
+    The leases were taken by the endpoint and are released when the stream ends.
+    """
+    try:
+        key = cache_key(filename, data)
+        cached = cache_lookup(key)
+        if cached:
+            yield format_event(fmt, "meta", {"method": cached["method"], "pages": 0})
+            yield format_event(fmt, "result", cached)
+            return
+
+        with upload_source(filename, data) as source:
+            method, tokens, jobs = await cpu_lease.execute(plan_scan, filename, source)
+            cpu_lease.release()
+            yield format_event(fmt, "meta", {"method": method, "pages": len(jobs)})
+
+            escalated = False
+            if jobs:
+                page_tokens = [OcrTokens.empty() for _ in jobs]
+                async for event in stream_pages(fmt, ocr_lease, jobs, page_tokens, OCR_DEFAULT_PROFILE):
+                    yield event
+                tokens = merge_pages(page_tokens)
+
+                reasons = escalation_reasons(tokens)
+                if reasons:
+                    escalated = True
+                    yield format_event(fmt, "escalate", {"profile": "accurate", "reasons": sorted(reasons)})
+                    second = []
+                    if "header" in reasons:
+                        func, args = header_job(jobs)
+                        header = (await _run_page(0, ocr_lease.execute(func, *args)))[1]
+                        usn, name = extract_student_details(header.texts)
+                        yield format_event(fmt, "header", {"profile": "accurate", "usn": usn, "student_name": name})
+                        second.append(header)
+                    if "table" in reasons:
+                        page_tokens = [OcrTokens.empty() for _ in jobs]
+                        async for event in stream_pages(fmt, ocr_lease, with_profile(jobs, "accurate"), page_tokens, "accurate"):
+                            yield event
+                        second.extend(page_tokens)
+                    tokens = apply_escalation(tokens, merge_pages(second), reasons)
+
+            yield format_event(fmt, "result", cache_store(key, build_result(method, tokens, escalated)))
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield format_event(fmt, "error", {"status": "error", "detail": error_detail(e)})
+    finally:
+        cpu_lease.release()
+        ocr_lease.release()
+
+# 11. RESULT CACHE (Students re-upload the same card again and again)
+SCAN_CACHE_ENABLED = os.getenv("SCAN_CACHE_ENABLED", "1") == "1"
+CACHED_FIELDS = ("method", "student_name", "usn", "sgpa", "subjects")
+
+scan_cache = ScanCache(
+    cache_dir=os.getenv("SCAN_CACHE_DIR", os.path.join("data", "cache", "scans")),
+    memory_items=int(os.getenv("SCAN_CACHE_MEMORY_ITEMS", 256)),
+    max_disk_bytes=int(os.getenv("SCAN_CACHE_MAX_MB", 256)) * 1024 * 1024,
+    ttl_seconds=int(os.getenv("SCAN_CACHE_TTL_HOURS", 168)) * 3600,
+)
+
+def cache_key(filename, data):
+    return ScanCache.key_for(data, os.path.splitext(filename or "")[1].lower())
+
+def cache_lookup(key):
+    if not SCAN_CACHE_ENABLED: return None
+    value = scan_cache.get(key, registry_fingerprint())
+    if value is None: return None
+    return {"status": "success", **value, "cached": True}
+
+def cache_store(key, result):
+    result["cached"] = False
+    # Only successful reads are worth keeping; errors should be retried
+    if SCAN_CACHE_ENABLED and result.get("status") == "success":
+        scan_cache.put(key, registry_fingerprint(), {field: result[field] for field in CACHED_FIELDS})
+    return result
+
 # --- API ENDPOINT (High Precision Mode) ---
 @router.post("/scan_marks_card")
-async def scan_marks_card(file: UploadFile = File(...)):
-    try:
-        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdir:
-            file_path = os.path.join(tmpdir, file.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+async def scan_marks_card(file: UploadFile = File(...), stream: Optional[str] = None):
+    """
+    Scans one marks card. Pages of scanned PDFs are read in parallel on the Eye worker pool.
+    Pass ?stream=ndjson or ?stream=sse to receive each page's subjects as soon as it is done.
+    """
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"stream must be one of {list(STREAM_FORMATS)}")
 
-            engine = get_ocr_engine()
-            
-            ocr_input = file_path
-            method = "OCR-Image"
-            
-            if file_path.lower().endswith('.pdf'):
-                doc = fitz.open(file_path)
-                
-                # FAST PATH: Check for Digital Text
-                digital_text = ""
-                for page in doc: digital_text += page.get_text()
-                
-                if len(digital_text) > 100:
-                    print("⚡ Fast Path: Digital PDF detected.")
-                    # Treat digital text like OCR output list
-                    text_list = digital_text.split()
-                    method = "Digital-PDF"
-                else:
-                    print("🐢 Slow Path: Scanned PDF detected (High Res).")
-                    # Render at 200 DPI for accuracy
-                    pix = doc.load_page(0).get_pixmap(dpi=200)
-                    img_path = os.path.join(tmpdir, "page0.png")
-                    pix.save(img_path)
-                    ocr_input = img_path
-                    
-                    # Run OCR
-                    result = engine.ocr(ocr_input)
-                    text_list = extract_any_text(result)
-                    method = "OCR-PDF"
-                
-                doc.close()
-            else:
-                # Image
-                result = engine.ocr(ocr_input)
-                text_list = extract_any_text(result)
-            
-            if not text_list:
-                return {"status": "error", "detail": "No text found"}
+    data = await file.read()
+    if stream:
+        # Reserve up front: once the stream has started we can no longer answer 429.
+        # The page count isn't known before planning, so the stream holds one full window of OCR slots.
+        cpu_lease = cpu_pool.admit()
+        try:
+            ocr_lease = ocr_pool.admit(ocr_pool.max_workers)
+        except HTTPException:
+            cpu_lease.release()
+            raise
+        return StreamingResponse(
+            stream_scan(file.filename, data, stream, cpu_lease, ocr_lease),
+            media_type=STREAM_FORMATS[stream],
+            # Also covers a client that disconnects before the stream is ever iterated
+            background=BackgroundTask(release_leases, cpu_lease, ocr_lease),
+        )
 
-            # Parse
-            usn, name = extract_student_details(text_list)
-            subjects = parse_text_stream(text_list)
-            
-            total_credits = sum(s['credits'] for s in subjects)
-            total_points = sum(s['earned_points'] for s in subjects)
-            sgpa = round(total_points / total_credits, 2) if total_credits > 0 else 0.0
-
-            return {
-                "status": "success",
-                "method": method,
-                "student_name": name,
-                "usn": usn,
-                "sgpa": sgpa,
-                "subjects": subjects
-            }
+    key = cache_key(file.filename, data)
+    cached = cache_lookup(key)
+    if cached:
+        print("♻️ Cache hit: card already scanned.")
+        return cached
+
+    try:
+        with upload_source(file.filename, data) as source:
+            method, tokens, jobs = await cpu_pool.run(plan_scan, file.filename, source)
+            escalated = False
+            if jobs:
+                tokens, escalated = await read_document(jobs)
+            return cache_store(key, build_result(method, tokens, escalated))
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+# --- API ENDPOINT (Batch Mode: a whole department at once) ---
+@router.post("/scan_marks_cards")
+async def scan_marks_cards(files: List[UploadFile] = File(...)):
+    """
+    Scans many marks cards (or .zip archives of them) in parallel across the Eye worker pool.
+    """
+    jobs, size = [], 0
+    for upload in files:
+        try:
+            expanded = expand_uploads(upload.filename, await upload.read(), len(jobs), size)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail=f"{upload.filename} is not a valid zip archive")
+        jobs.extend(expanded)
+        size += sum(len(data) for _, data in expanded)
+
+    if not jobs:
+        raise HTTPException(status_code=400, detail="No scannable files (PDF/PNG/JPG) in upload")
+
+    # Serve repeats from the cache; only unseen cards go to the workers
+    keys = [cache_key(name, data) for name, data in jobs]
+    results = [None] * len(jobs)
+    misses = []
+    for i, ((name, data), key) in enumerate(zip(jobs, keys)):
+        cached = cache_lookup(key)
+        if cached:
+            results[i] = {**cached, "filename": name}
+        else:
+            misses.append(i)
+
+    print(f"📚 Batch scan: {len(jobs)} file(s), {len(misses)} to read across {OCR_WORKERS} worker(s).")
+    if misses:
+        # Plan every file first: digital PDFs finish here and never touch the OCR workers
+        plans = await cpu_pool.map(_plan_job, [jobs[i] for i in misses])
+
+        # Then read every scanned page of every file in one go across the worker pool
+        planned = {i: plan for i, (plan, _) in zip(misses, plans) if plan}
+        reads = await read_files({i: plan[2] for i, plan in planned.items() if plan[2]})
+
+        # Second round, accurate profile, only for the cards the fast read could not make sense of
+        escalate = {i: escalation_reasons(tokens) for i, (tokens, error) in reads.items() if not error}
+        escalate = {i: reasons for i, reasons in escalate.items() if reasons}
+        escalated = set()
+        second = await read_files({i: escalation_jobs(planned[i][2], reasons) for i, reasons in escalate.items()})
+        for i, (tokens, error) in second.items():
+            # A failed accurate pass keeps the fast read: still a result, just not escalated
+            if not error:
+                reads[i] = (apply_escalation(reads[i][0], tokens, escalate[i]), None)
+                escalated.add(i)
+
+        for i, (plan, error) in zip(misses, plans):
+            if plan:
+                method, tokens, file_jobs = plan
+                if file_jobs:
+                    tokens, error = reads[i]
+            result = {"status": "error", "detail": error} if error else build_result(method, tokens, i in escalated)
+            results[i] = {**cache_store(keys[i], result), "filename": jobs[i][0]}
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "status": "success",
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
+@router.get("/scan_cache/stats")
+async def scan_cache_stats():
+    counters = metrics.snapshot()["counters"]
+    return {
+        "enabled": SCAN_CACHE_ENABLED,
+        "registry_fingerprint": registry_fingerprint(),
+        **{name.split("scan_cache.", 1)[1]: value for name, value in counters.items() if name.startswith("scan_cache.")},
+        **scan_cache.stats(),
+    }
+
+@router.get("/ocr/stats")
+async def ocr_stats():
+    counters = metrics.snapshot()["counters"]
+    documents = counters.get("ocr.documents", 0)
+    return {
+        "default_profile": OCR_DEFAULT_PROFILE,
+        "escalation_enabled": OCR_ESCALATION,
+        "profiles": OCR_PROFILES,
+        "escalation_rate": round(counters.get("ocr.documents.escalated", 0) / documents, 3) if documents else 0.0,
+        **{name.split("ocr.", 1)[1]: value for name, value in counters.items() if name.startswith("ocr.")},
+    }
\ No newline at end of file
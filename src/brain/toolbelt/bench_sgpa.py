@@ -0,0 +1,98 @@
+# Run from the repo root: python -m src.brain.toolbelt.bench_sgpa [--students 5000] [--url http://localhost:8000/api/v1]
+# Students/sec for a whole cohort: one /calculate_sgpa call per student-semester vs one /calculate_sgpa/bulk upload.
+# Without --url both endpoints run in-process through FastAPI's TestClient (same validation + JSON, no network).
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+
+from src.brain.toolbelt.planner import GRADE_KEYS
+
+# 1. The Cohort
+def make_cohort(students, semesters=8, courses=8, seed=42):
+    # One row per course taken, like a university results export
+    rng = np.random.default_rng(seed)
+    n = students * semesters * courses
+    return pd.DataFrame({
+        "usn": np.repeat([f"1XX22CS{i:04d}" for i in range(students)], semesters * courses),
+        "semester": np.tile(np.repeat(np.arange(1, semesters + 1), courses), students),
+        "name": np.tile([f"Course {c + 1}" for c in range(courses)], students * semesters),
+        "credits": rng.choice([1, 2, 3, 4], n),
+        "grade": rng.choice(GRADE_KEYS, n, p=[0.12, 0.2, 0.24, 0.18, 0.11, 0.06, 0.04, 0.04, 0.01]),
+    })
+
+# 2. The Clients
+def in_process_client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.brain.routers import calc_router
+    app = FastAPI()
+    app.include_router(calc_router.router, prefix="/api/v1")
+    return TestClient(app), "/api/v1"
+
+def http_client(url):
+    import requests
+    return requests.Session(), url.rstrip("/")
+
+# 3. The Runs
+def per_student(client, base, cohort):
+    """
+    The old way: one /calculate_sgpa per semester, CGPA = Σ(SGPA × Credits) / ΣCredits on the client (as the dashboard does).
+    """
+    cgpa = {}
+    for usn, student in cohort.groupby("usn", sort=False):
+        weighted, credits = 0.0, 0
+        for _, semester in student.groupby("semester", sort=False):
+            courses = semester[["name", "credits", "grade"]].to_dict(orient="records")
+            result = client.post(f"{base}/calculate_sgpa", json=courses).json()
+            weighted += result["sgpa"] * result["total_credits"]
+            credits += result["total_credits"]
+        cgpa[usn] = round(weighted / credits, 2) if credits else 0.0
+    return cgpa
+
+def bulk(client, base, cohort):
+    upload = cohort.to_csv(index=False).encode()
+    response = client.post(f"{base}/calculate_sgpa/bulk", files={"file": ("cohort.csv", upload, "text/csv")})
+    response.raise_for_status()
+    return {s["usn"]: s["cgpa"] for s in response.json()["students"]}
+
+def timed(func, *args):
+    started = time.perf_counter()
+    # The per-call endpoints print a line each; keep the terminal out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-student vs bulk SGPA/CGPA throughput.")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--semesters", type=int, default=8)
+    parser.add_argument("--courses", type=int, default=8, help="Courses per semester")
+    parser.add_argument("--sample", type=int, default=200, help="Students sent through the per-student path (it is slow)")
+    parser.add_argument("--url", default=None, help="A running API, e.g. http://localhost:8000/api/v1")
+    args = parser.parse_args()
+
+    cohort = make_cohort(args.students, args.semesters, args.courses)
+    client, base = http_client(args.url) if args.url else in_process_client()
+    print(f"🎓 {args.students} students x {args.semesters} semesters x {args.courses} courses = {len(cohort)} rows "
+          f"({'HTTP ' + base if args.url else 'in-process'}).")
+
+    sample = cohort[cohort["usn"].isin(cohort["usn"].unique()[:args.sample])]
+    expected, slow = timed(per_student, client, base, sample)
+    timed(bulk, client, base, sample)  # Warm-up (pool start, imports)
+    actual, fast = timed(bulk, client, base, cohort)
+
+    slow_rate = len(expected) / slow
+    fast_rate = len(actual) / fast
+    print(f"🐢 Per-student: {len(expected)} students in {slow:.2f}s -> {slow_rate:,.0f} students/s "
+          f"({len(expected) * args.semesters} requests)")
+    print(f"🚀 Bulk:        {len(actual)} students in {fast:.2f}s -> {fast_rate:,.0f} students/s (1 request)")
+    print(f"   Speed-up: {fast_rate / slow_rate:,.0f}x")
+
+    mismatches = [usn for usn, cgpa in expected.items() if abs(actual[usn] - cgpa) > 0.005]
+    print(f"{'✅' if not mismatches else '❌'} {len(mismatches)} CGPA mismatches over {len(expected)} sampled students.")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor
+from fastapi import HTTPException
+
+from src.brain.toolbelt import metrics
+
+# The Muscles: every blocking call in the Brain runs here, never on the event loop.
+#   cpu -> threads for XGBoost (releases the GIL while predicting) and PDF planning/text extraction.
+#          PyMuPDF holds the GIL, so those threads buy no parallelism: they only keep the event loop free.
+#          Rendering scanned pages for OCR happens inside the ocr processes.
+#   io  -> threads for Postgres and Ollama
+#   ocr -> processes with a preloaded PaddleOCR each (created by ocr_router)
+# A request reserves its slots when it is admitted (a Lease) and holds them until it is done.
+# A pool never holds more than max_workers + max_queue slots; beyond that the request is turned
+# away with 429 + Retry-After instead of piling up behind a slow OCR call.
+
+class Lease:
+    """
+    The slots one request holds in a pool. Its jobs run at most `slots` at a time,
+    however many it submits. release() (or leaving the `with` block) gives the slots back.
+    """
+
+    def __init__(self, pool, slots):
+        self.pool = pool
+        self.slots = slots
+        self._window = asyncio.Semaphore(slots)
+        self._released = False
+
+    async def execute(self, func, *args, **kwargs):
+        async with self._window:
+            return await self.pool._execute(func, *args, **kwargs)
+
+    async def map(self, func, arg_tuples):
+        return await asyncio.gather(*[self.execute(func, *args) for args in arg_tuples])
+
+    def release(self):
+        # Idempotent: streaming responses release from more than one place
+        if not self._released:
+            self._released = True
+            self.pool._inflight -= self.slots
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class BoundedPool:
+    def __init__(self, name, kind="thread", max_workers=4, max_queue=16, initializer=None, retry_after=2):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.retry_after = retry_after
+        self._executor = None
+        self._inflight = 0  # Slots held by admitted requests
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                print(f"💪 Starting '{self.name}' pool ({self.max_workers} processes)...")
+                # 'spawn' keeps Paddle/Torch thread state out of the children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"brain-{self.name}",
+                    initializer=self.initializer,
+                )
+        return self._executor
+
+    def admit(self, jobs=1):
+        """
+        Reserves slots for a request of `jobs` jobs: one per job, up to max_workers (more would only wait
+        in its own window). Raises 429 if they don't fit next to what the pool already holds.
+        """
+        slots = max(1, min(jobs, self.max_workers))
+        if self._inflight + slots > self.max_workers + self.max_queue:
+            metrics.increment(f"pool.{self.name}.rejected")
+            raise HTTPException(
+                status_code=429,
+                detail=f"The '{self.name}' workers are busy. Please retry shortly.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self._inflight += slots  # Only touched from the event loop, so no lock needed
+        return Lease(self, slots)
+
+    async def _execute(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        except BrokenExecutor:
+            # A worker died (OOM, segfault in a native lib). Start fresh next time; the old pool's
+            # surviving workers are shut down instead of lingering with their models loaded.
+            if self._executor is executor:
+                metrics.increment(f"pool.{self.name}.broken")
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise HTTPException(status_code=503, detail=f"The '{self.name}' workers crashed and are restarting.")
+
+    async def run(self, func, *args, **kwargs):
+        with self.admit() as lease:
+            return await lease.execute(func, *args, **kwargs)
+
+    async def map(self, func, arg_tuples):
+        """
+        Runs one job per args tuple as a single request, fed to the pool
+        at most max_workers at a time so a big batch cannot starve everyone else.
+        """
+        arg_tuples = list(arg_tuples)
+        with self.admit(len(arg_tuples)) as lease:
+            return await lease.map(func, arg_tuples)
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "inflight": self._inflight,
+            "started": self._executor is not None,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Registry of every pool in the process (for /metrics and shutdown)
+_pools = {}
+
+def create_pool(name, **kwargs):
+    if name not in _pools:
+        _pools[name] = BoundedPool(name, **kwargs)
+    return _pools[name]
+
+def stats():
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+def shutdown_all():
+    for pool in _pools.values():
+        pool.shutdown()
+
+cpu_pool = create_pool(
+    "cpu",
+    max_workers=int(os.getenv("CPU_POOL_WORKERS", os.cpu_count() or 2)),
+    max_queue=int(os.getenv("CPU_POOL_QUEUE", 64)),
+)
+io_pool = create_pool(
+    "io",
+    max_workers=int(os.getenv("IO_POOL_WORKERS", 16)),
+    max_queue=int(os.getenv("IO_POOL_QUEUE", 64)),
+)
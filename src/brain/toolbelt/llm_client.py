@@ -0,0 +1,143 @@
+import os
+import json
+import asyncio
+import hashlib
+import httpx
+
+from src.brain.toolbelt import metrics
+
+# The Mouth: one async, keep-alive HTTP client to Ollama's /api/chat for the whole process.
+# Point OLLAMA_BASE_URL at any server that speaks /api/chat (e.g. a local stub in tests).
+
+# 1. Configuration
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "phi3:mini")
+OLLAMA_PARALLEL = int(os.getenv("OLLAMA_PARALLEL", 1))  # Match the server's OLLAMA_NUM_PARALLEL
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", 120))  # Seconds, queueing + generation
+
+class LLMError(Exception):
+    pass
+
+class LLMTimeout(LLMError):
+    pass
+
+# 2. The Client
+class OllamaClient:
+    """
+    - At most `max_concurrency` generations hit Ollama at once (its parallel slots); the rest wait their turn.
+    - Every call has a deadline covering both the wait and the generation.
+    - Identical concurrent chat() calls share one generation (single-flight).
+    """
+
+    def __init__(self, base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL, max_concurrency=OLLAMA_PARALLEL, timeout=OLLAMA_TIMEOUT):
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client = None
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(None, connect=5.0),  # Deadlines are enforced per call below
+                limits=httpx.Limits(max_connections=self.max_concurrency * 2, max_keepalive_connections=self.max_concurrency * 2, keepalive_expiry=300),
+            )
+        return self._client
+
+    def _payload(self, messages, model, stream, options):
+        payload = {"model": model or self.model, "messages": messages, "stream": stream}
+        if options:
+            payload["options"] = options
+        return payload
+
+    async def chat(self, messages, model=None, options=None, timeout=None):
+        """
+        Returns Ollama's /api/chat response (dict with 'message', 'prompt_eval_count', ...).
+        Raises LLMTimeout past the deadline and LLMError for anything else.
+        """
+        payload = self._payload(messages, model, False, options)
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(payload, timeout or self.timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            metrics.increment("llm.generations")
+        else:
+            metrics.increment("llm.coalesced")
+        # shield: a caller that disconnects must not cancel a generation others are waiting on
+        return await asyncio.shield(task)
+
+    async def _generate(self, payload, timeout):
+        started = asyncio.get_running_loop().time()
+        try:
+            async with asyncio.timeout(timeout):
+                async with self._slots:
+                    metrics.observe("llm.queue_wait", asyncio.get_running_loop().time() - started)
+                    response = await self.client.post("/api/chat", json=payload)
+                    response.raise_for_status()
+                    return response.json()
+        except TimeoutError:
+            metrics.increment("llm.timeouts")
+            raise LLMTimeout(f"No answer from Ollama within {timeout:g}s")
+        except httpx.HTTPError as e:
+            metrics.increment("llm.errors")
+            raise LLMError(str(e)) from e
+        finally:
+            metrics.observe("llm.chat", asyncio.get_running_loop().time() - started)
+
+    async def stream_chat(self, messages, model=None, options=None, timeout=None):
+        """
+        Yields Ollama's streamed chunks (dicts) as they arrive. Not coalesced: every stream is its own generation.
+        The deadline covers the whole stream and is checked between chunks.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        remaining = lambda: max(deadline - loop.time(), 0.001)
+        payload = self._payload(messages, model, True, options)
+        metrics.increment("llm.generations")
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), remaining())
+        except TimeoutError:
+            metrics.increment("llm.timeouts")
+            raise LLMTimeout("Timed out waiting for a free Ollama slot")
+        response = None
+        try:
+            request = self.client.build_request("POST", "/api/chat", json=payload)
+            response = await asyncio.wait_for(self.client.send(request, stream=True), remaining())
+            response.raise_for_status()
+            lines = response.aiter_lines()
+            while True:
+                try:
+                    line = await asyncio.wait_for(anext(lines), remaining())
+                except StopAsyncIteration:
+                    break
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                yield chunk
+                if chunk.get("done"):
+                    break
+        except TimeoutError:
+            metrics.increment("llm.timeouts")
+            raise LLMTimeout("Ollama stream exceeded its deadline")
+        except httpx.HTTPError as e:
+            metrics.increment("llm.errors")
+            raise LLMError(str(e)) from e
+        finally:
+            if response is not None:
+                await response.aclose()
+            self._slots.release()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+llm = OllamaClient()
\ No newline at end of file
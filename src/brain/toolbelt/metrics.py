@@ -0,0 +1,35 @@
+import threading
+from collections import defaultdict
+
+# The Stethoscope: in-process counters and timings, exposed at /metrics.
+# Each uvicorn worker keeps its own numbers; worker *processes* report back through their results.
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+def observe(name, seconds):
+    """
+    Records one duration (in seconds) under `name`.
+    """
+    with _lock:
+        stats = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+
+def snapshot():
+    with _lock:
+        timings = {
+            name: {
+                "count": t["count"],
+                "avg_ms": round(1000 * t["total"] / t["count"], 2) if t["count"] else 0.0,
+                "max_ms": round(1000 * t["max"], 2),
+            }
+            for name, t in _timings.items()
+        }
+        return {"counters": dict(_counters), "timings": timings}
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import shutil
+import uuid
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+from src.brain.toolbelt import metrics
+
+# The Pharmacy: every trained model is a numbered, immutable version with its metadata.
+#   models/<name>/v0001/model.json      -> the artifact
+#   models/<name>/v0001/metadata.json   -> features, metrics, params, sha256, created_at, ...
+#   models/<name>/CURRENT               -> the version being served (swapped atomically on publish)
+# models/ is <repo>/data/models (outside the source tree, mounted by docker-compose), whatever directory
+# the API is started from.
+
+# 1. Configuration
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(REPO_ROOT, "data", "models"))
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", 5))
+ARTIFACT_NAME = "model.json"
+
+def model_dir(name):
+    return os.path.join(REGISTRY_DIR, name)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# 2. Publishing (training scripts)
+def list_versions(name):
+    try:
+        return sorted(v for v in os.listdir(model_dir(name)) if v.startswith("v") and v[1:].isdigit())
+    except FileNotFoundError:
+        return []
+
+def next_version(name):
+    versions = list_versions(name)
+    return f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+
+def publish(name, save, metadata, activate=True, version=None):
+    """
+    save(path) writes the artifact (e.g. model.save_model). Returns the new version.
+    The version directory appears fully written or not at all; CURRENT moves only afterwards.
+    Two publishers racing for the same number: the rename decides, the loser takes the next one.
+    A fixed `version` that already exists raises FileExistsError instead.
+    """
+    root = model_dir(name)
+    tmp_dir = os.path.join(root, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(tmp_dir)
+    try:
+        artifact = os.path.join(tmp_dir, ARTIFACT_NAME)
+        save(artifact)
+        fixed = version is not None
+        details = {"sha256": file_hash(artifact), "size_bytes": os.path.getsize(artifact)}
+        while True:
+            version = version if fixed else next_version(name)
+            metadata = {
+                **metadata,
+                "name": name,
+                "version": version,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                **details,
+            }
+            with open(os.path.join(tmp_dir, "metadata.json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=2)
+            try:
+                os.rename(tmp_dir, os.path.join(root, version))
+                break
+            except OSError:
+                # Taken meanwhile (non-empty target: ENOTEMPTY / EEXIST on POSIX, FileExistsError on Windows)
+                if not os.path.isdir(os.path.join(root, version)):
+                    raise
+                if fixed:
+                    raise FileExistsError(f"{name} {version} already exists")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # Gone already when the rename succeeded
+    if activate:
+        set_current(name, version)
+    print(f"📦 Published {name} {version} ({metadata['size_bytes'] // 1024} KB).")
+    return version
+
+def set_current(name, version):
+    # Also the rollback: set_current("doctor", "v0003")
+    tmp_path = os.path.join(model_dir(name), f"CURRENT.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(model_dir(name), "CURRENT"))
+
+def current_version(name):
+    try:
+        with open(os.path.join(model_dir(name), "CURRENT"), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def read_metadata(name, version):
+    with open(os.path.join(model_dir(name), version, "metadata.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def import_legacy(name, path, metadata):
+    """
+    One-time migration: publishes a model file from before the registry as v0001 if the registry has none.
+    Every API worker runs it at startup: the first to rename v0001 into place wins, the rest find it migrated.
+    """
+    if list_versions(name) or not os.path.exists(path):
+        return None
+    with open(path, "rb") as src:
+        data = src.read()
+    def save(target):
+        with open(target, "wb") as dst:
+            dst.write(data)
+    try:
+        return publish(name, save, {**metadata, "source": os.path.basename(path)}, version="v0001")
+    except FileExistsError:
+        return None
+
+# 3. Serving (the API): the active version, hot-swapped by a watcher thread
+def files_stamp(name, version):
+    """
+    Changes whenever the version's artifact or metadata is rewritten (a broken version fixed in place).
+    """
+    stamp = []
+    for file_name in (ARTIFACT_NAME, "metadata.json"):
+        try:
+            stat = os.stat(os.path.join(model_dir(name), version, file_name))
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+class Served(NamedTuple):
+    version: str
+    metadata: dict
+    model: Any  # Whatever load() built: read it once per request and use that copy throughout
+
+class HotModel:
+    """
+    load(artifact_path, metadata) builds the served object; warm_up(obj) must run one real prediction.
+    A new version is only swapped in after both succeed. A broken version is logged and skipped,
+    and the old one keeps serving. Requests in flight keep the Served they already hold.
+    """
+
+    def __init__(self, name, load, warm_up, poll_seconds=MODEL_POLL_SECONDS):
+        self.name = name
+        self.load = load
+        self.warm_up = warm_up
+        self.poll_seconds = poll_seconds
+        self.active = None
+        self._failed = None  # (version, files_stamp) that failed: retried once its files change on disk
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def refresh(self):
+        version = current_version(self.name)
+        if version is None or (self.active and self.active.version == version):
+            return self.active
+        if self._failed and self._failed == (version, files_stamp(self.name, version)):
+            return self.active
+        with self._lock:
+            if self.active and self.active.version == version:
+                return self.active
+            started = time.perf_counter()
+            stamp = files_stamp(self.name, version)
+            try:
+                metadata = read_metadata(self.name, version)
+                artifact = os.path.join(model_dir(self.name), version, ARTIFACT_NAME)
+                if file_hash(artifact) != metadata["sha256"]:
+                    raise ValueError("artifact hash does not match its metadata")
+                candidate = self.load(artifact, metadata)
+                self.warm_up(candidate)
+            except Exception as e:
+                self._failed = (version, stamp)
+                metrics.increment(f"models.{self.name}.failed_loads")
+                print(f"⚠️ {self.name} {version} failed to load ({e}). Still serving {self.active.version if self.active else 'nothing'}.")
+                return self.active
+            previous = self.active.version if self.active else None
+            self.active = Served(version, metadata, candidate)  # One assignment: the swap is atomic
+            metrics.increment(f"models.{self.name}.swaps")
+            metrics.observe(f"models.{self.name}.load", time.perf_counter() - started)
+            print(f"🔄 {self.name}: now serving {version} (was {previous}).")
+            return self.active
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ {self.name} watcher: {e}")
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name=f"{self.name}-model-watcher", daemon=True)
+            self._watcher.start()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "active": self.active.metadata if self.active else None,
+            "versions": list_versions(self.name),
+            "current": current_version(self.name),
+            "failed": self._failed[0] if self._failed else None,
+        }
\ No newline at end of file
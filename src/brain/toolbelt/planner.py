@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional
+import numpy as np
+import pandas as pd
 
 # 1. The Official VTU Grading Scale (From PDF Clause 220B 6.1)
 # We hardcode this to ensure 100% accuracy. Phi-3 doesn't guess.
@@ -15,6 +17,21 @@ GRADE_POINTS = {
     "AB": 0,   # Absent
 }
 
+# Vectorized form of the same scale: category code -> points, with a trailing 0 for unknown grades (code -1)
+GRADE_KEYS = list(GRADE_POINTS)
+GRADE_POINT_TABLE = np.array(list(GRADE_POINTS.values()) + [0], dtype=np.int64)
+
+def grade_points(grades):
+    """
+    Points for a whole column of grade strings at once. Returns (points, known mask).
+    Same normalization as calculate_sgpa ("a+ " == "A+"); unknown grades score 0.
+    """
+    # A cohort has thousands of rows but only a handful of distinct spellings: normalize those, not every row
+    rows, spellings = pd.factorize(pd.Series(grades, dtype="string"), use_na_sentinel=False)
+    normalized = pd.Series(spellings, dtype="string").str.upper().str.strip()
+    codes = pd.Categorical(normalized, categories=GRADE_KEYS).codes[rows]
+    return GRADE_POINT_TABLE[codes], codes >= 0
+
 class CourseInput(BaseModel):
     name: str
     credits: int
@@ -76,4 +93,52 @@ class Planner:
             earned_points=total_points,
             sgpa=sgpa,
             status=status
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def bulk_sgpa(courses: pd.DataFrame):
+        """
+        Columnar SGPA + CGPA for a whole cohort. One row per course taken:
+            usn, semester, credits, grade  (name optional)
+        Returns (semesters, students) DataFrames:
+            semesters: usn, semester, total_credits, earned_points, sgpa, failed_courses, unknown_grades
+            students:  usn, semesters, total_credits, cgpa, failed_courses
+        SGPA matches calculate_sgpa; CGPA = Σ(SGPA × semester credits) / Σ credits, as on the dashboard.
+        """
+        points, known = grade_points(courses["grade"].to_numpy())
+        credits = courses["credits"].to_numpy(dtype=np.int64)
+
+        # Group-by (usn, semester) with factorize + bincount: no Python loop over students
+        student_codes, usns = pd.factorize(courses["usn"])
+        semester_codes, semester_numbers = pd.factorize(courses["semester"])
+        group, keys = pd.factorize(student_codes * len(semester_numbers) + semester_codes)
+        n = len(keys)
+        total_credits = np.bincount(group, weights=credits, minlength=n).astype(np.int64)
+        earned_points = np.bincount(group, weights=credits * points, minlength=n).astype(np.int64)
+        failed = np.bincount(group, weights=points == 0, minlength=n).astype(np.int64)
+        unknown = np.bincount(group, weights=~known, minlength=n).astype(np.int64)
+        sgpa = np.round(np.divide(earned_points, total_credits, out=np.zeros(n), where=total_credits > 0), 2)
+
+        semesters = pd.DataFrame({
+            "usn": usns[keys // len(semester_numbers)],
+            "semester": semester_numbers[keys % len(semester_numbers)],
+            "total_credits": total_credits,
+            "earned_points": earned_points,
+            "sgpa": sgpa,
+            "failed_courses": failed,
+            "unknown_grades": unknown,
+        })
+
+        # Second group-by: semesters -> students (each key carries its student code)
+        student = keys // len(semester_numbers)
+        m = len(usns)
+        student_credits = np.bincount(student, weights=total_credits, minlength=m)
+        weighted = np.bincount(student, weights=sgpa * total_credits, minlength=m)
+        students = pd.DataFrame({
+            "usn": usns,
+            "semesters": np.bincount(student, minlength=m),
+            "total_credits": student_credits.astype(np.int64),
+            "cgpa": np.round(np.divide(weighted, student_credits, out=np.zeros(m), where=student_credits > 0), 2),
+            "failed_courses": np.bincount(student, weights=failed, minlength=m).astype(np.int64),
+        })
+        return semesters, students
\ No newline at end of file
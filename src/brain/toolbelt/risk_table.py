@@ -0,0 +1,99 @@
+# Run from the repo root: python -m src.brain.toolbelt.risk_table   (full check against XGBoost)
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# The Doctor's Cheat Sheet: every valid patient has only 4*4*94*5*5*5 = 188,000 possible answers,
+# so we ask XGBoost all of them once at load time and afterwards just look the answer up.
+
+# 1. The Input Space (must match StudentHealth and the training columns)
+FEATURES = ['study_time', 'failures', 'absences', 'free_time', 'health', 'alcohol_daily']
+FEATURE_RANGES = {
+    'study_time': (1, 4),
+    'failures': (0, 3),
+    'absences': (0, 93),
+    'free_time': (1, 5),
+    'health': (1, 5),
+    'alcohol_daily': (1, 5),
+}
+LOWS = np.array([FEATURE_RANGES[f][0] for f in FEATURES])
+HIGHS = np.array([FEATURE_RANGES[f][1] for f in FEATURES])
+SHAPE = tuple(int(s) for s in HIGHS - LOWS + 1)
+
+DOCTOR_COMPILED = os.getenv("DOCTOR_COMPILED", "1") == "1"
+VERIFY_SAMPLES = 256  # Random inputs re-checked against XGBoost whenever a table is compiled for serving
+
+def grid():
+    # Every valid input, in C order of SHAPE (row i of the grid is flat index i of the table)
+    axes = [np.arange(lo, hi + 1) for lo, hi in zip(LOWS, HIGHS)]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return np.stack([m.ravel() for m in mesh], axis=1)
+
+def in_range(rows):
+    rows = np.asarray(rows)
+    return np.all((rows >= LOWS) & (rows <= HIGHS), axis=-1)
+
+# 2. The Table
+class RiskTable:
+    def __init__(self, probabilities):
+        self.probabilities = probabilities  # float32, shape SHAPE: P(at risk) straight from XGBoost
+
+    @classmethod
+    def compile(cls, model):
+        started = time.perf_counter()
+        points = pd.DataFrame(grid(), columns=FEATURES)
+        probabilities = model.predict_proba(points)[:, 1].astype(np.float32).reshape(SHAPE)
+        print(f"📇 Risk table compiled: {probabilities.size} inputs in {time.perf_counter() - started:.2f}s ({probabilities.nbytes // 1024} KB).")
+        return cls(probabilities)
+
+    def lookup(self, row):
+        """
+        P(at risk) for one (study_time, failures, absences, free_time, health, alcohol_daily), or None if out of range.
+        """
+        index = tuple(int(v) - int(lo) for v, lo in zip(row, LOWS))
+        if not all(0 <= i < s for i, s in zip(index, SHAPE)):
+            return None
+        return float(self.probabilities[index])
+
+    def lookup_many(self, rows):
+        """
+        Vectorized lookup. Returns (probabilities, in_range mask); out-of-range rows are NaN.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        mask = in_range(rows)
+        probabilities = np.full(len(rows), np.nan, dtype=np.float32)
+        if mask.any():
+            flat = np.ravel_multi_index(tuple((rows[mask] - LOWS).T), SHAPE)
+            probabilities[mask] = self.probabilities.reshape(-1)[flat]
+        return probabilities, mask
+
+# 3. The Check: the table must agree with XGBoost bit for bit
+def verify(model, table, samples=None, seed=0):
+    """
+    samples=None re-predicts the whole grid in small batches; an int checks that many random
+    inputs one at a time through the regular one-row DataFrame path. Returns the number of mismatches.
+    """
+    points = grid()
+    if samples is None:
+        expected = np.concatenate([
+            model.predict_proba(pd.DataFrame(points[i:i + 997], columns=FEATURES))[:, 1]
+            for i in range(0, len(points), 997)
+        ]).astype(np.float32)
+    else:
+        points = points[np.random.default_rng(seed).choice(len(points), samples, replace=False)]
+        expected = np.array([
+            model.predict_proba(pd.DataFrame([row], columns=FEATURES))[0][1] for row in points
+        ], dtype=np.float32)
+    actual, _ = table.lookup_many(points)
+    mismatches = int(np.count_nonzero(actual != expected))
+    # predict() is predict_proba() > 0.5 for binary:logistic, so labels can't disagree if probabilities don't
+    return mismatches
+
+if __name__ == "__main__":
+    from src.brain.routers.doctor_router import doctor
+    doctor_model = doctor.active.model.model
+    table = RiskTable.compile(doctor_model)
+    started = time.perf_counter()
+    mismatches = verify(doctor_model, table)
+    print(f"{'✅' if mismatches == 0 else '❌'} {mismatches} mismatches over {table.probabilities.size} inputs ({time.perf_counter() - started:.1f}s).")
\ No newline at end of file
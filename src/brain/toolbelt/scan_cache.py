@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.brain.toolbelt import metrics
+
+class ScanCache:
+    """
+    Two-tier result cache for the Eye, keyed by the SHA-256 of the uploaded bytes.
+    Tier 1 is an in-memory LRU, tier 2 is a directory of JSON files bounded by size and age.
+    Every entry remembers the registry fingerprint it was parsed with; a mismatch is a miss.
+    """
+
+    def __init__(self, cache_dir, memory_items=256, max_disk_bytes=256 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # Measured lazily on the first write
+        self._fingerprint = None
+
+    @staticmethod
+    def key_for(data, kind=""):
+        # `kind` (e.g. the file extension) keeps identical bytes read two different ways apart
+        digest = hashlib.sha256(kind.encode("utf-8") + b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _check_fingerprint(self, fingerprint):
+        # Registry changed since we last looked: nothing in memory can be trusted any more
+        if fingerprint != self._fingerprint:
+            if self._fingerprint is not None and self._memory:
+                metrics.increment("scan_cache.invalidations", len(self._memory))
+            self._memory.clear()
+            self._fingerprint = fingerprint
+
+    def get(self, key, fingerprint):
+        now = time.time()
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry["created"] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    metrics.increment("scan_cache.hits.memory")
+                    return entry["value"]
+                del self._memory[key]
+
+        entry = self._read_disk(key, fingerprint, now)
+        if entry is None:
+            metrics.increment("scan_cache.misses")
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+        metrics.increment("scan_cache.hits.disk")
+        return entry["value"]
+
+    def put(self, key, fingerprint, value):
+        entry = {"fingerprint": fingerprint, "created": time.time(), "value": value}
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key, fingerprint, now):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("fingerprint") != fingerprint or now - entry.get("created", 0) > self.ttl_seconds:
+            metrics.increment("scan_cache.invalidations")
+            try: size = os.path.getsize(path)
+            except OSError: size = 0
+            if self._remove(path):
+                with self._lock:
+                    if self._disk_bytes is not None:
+                        self._disk_bytes -= size
+            return None
+
+        try: os.utime(path)  # Touch so size-based eviction drops the least recently used file
+        except OSError: pass
+        return entry
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            try: previous = os.path.getsize(path)  # A re-store (after expiry) replaces the old file
+            except OSError: previous = 0
+            os.replace(tmp_path, path)  # Atomic: readers never see half a file
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠️ Scan cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._measure_disk()[1]
+            else:
+                self._disk_bytes += size - previous
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _measure_disk(self):
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".json"): continue
+                path = os.path.join(root, name)
+                try: stat = os.stat(path)
+                except OSError: continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files, sum(size for _, size, _ in files)
+
+    def _evict_disk(self):
+        """
+        Drops expired files first, then the least recently used ones, down to 90% of the budget.
+        """
+        files, total = self._measure_disk()
+        cutoff = time.time() - self.ttl_seconds
+        target = self.max_disk_bytes * 0.9
+        evicted = 0
+        for mtime, size, path in sorted(files):
+            if total <= target and mtime >= cutoff:
+                break
+            if self._remove(path):
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+        metrics.increment("scan_cache.evictions", evicted)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "memory_capacity": self.memory_items,
+                "disk_bytes": self._disk_bytes,
+                "disk_capacity": self.max_disk_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -1,48 +1,240 @@
-import pandas as pd
+# Run from the repo root: python -m src.brain.toolbelt.train_doctor [--data uci|synthetic] [--search grid|random] ...
+# One training pipeline for the Burnout Doctor:
+#   hyperparameter search (parallel, k-fold CV) -> accuracy/AUC + size per candidate
+#   -> best-ranked candidates refit on all rows and timed one at a time (no other work on the machine)
+#   -> the best one within the latency budgets -> published to the model registry
+import os
+import time
+import json
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
+import pandas as pd
 import xgboost as xgb
-import os
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+from src.brain.toolbelt import model_registry
+from src.brain.toolbelt.risk_table import FEATURES, FEATURE_RANGES, VERIFY_SAMPLES, RiskTable, verify
 
 # 1. Configuration
-MODEL_PATH = os.path.join("src", "brain", "toolbelt", "doctor_model.json")
-
-def train_model():
-    print("👨‍⚕️ The Doctor is studying previous student records...")
-
-    # 2. Generate Synthetic Data (Simulating UCI Student Performance Dataset)
-    # Features: [StudyTime, Failures, Absences, FreeTime, Health]
-    # Target: [Burnout_Risk] (0 = Safe, 1 = At Risk)
-    
-    data_size = 1000
-    np.random.seed(42)
-    
-    X = pd.DataFrame({
-        'study_time': np.random.randint(1, 5, data_size),    # 1=Low, 4=High
-        'failures': np.random.randint(0, 4, data_size),      # Past failures
-        'absences': np.random.randint(0, 20, data_size),     # Days absent
-        'free_time': np.random.randint(1, 6, data_size),     # 1=Low, 5=High
-        'health': np.random.randint(1, 6, data_size)         # 1=Bad, 5=Good
-    })
-
-    # Logic: High failures + High absences + Low study = Burnout
+CSV_PATH = os.path.join("data", "student-mat.csv")
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [2, 3, 4, 6],
+    "learning_rate": [0.05, 0.1, 0.2],
+    "subsample": [0.8, 1.0],
+}
+LATENCY_ROWS = 10000  # Rows per timed batch predict
+# The API answers in-range students from the compiled RiskTable: its lookup costs the same for every model,
+# but compiling + verifying the table is work the API does on every hot swap. predict_proba still serves
+# out-of-range rows and DOCTOR_COMPILED=0, so both are budgeted.
+LATENCY_BUDGET_US = 2.0  # Per-row batch inference budget (microseconds)
+TABLE_BUILD_BUDGET_S = 2.0  # RiskTable.compile + verify, as load_doctor runs them (seconds)
+
+# 2. The Data
+def load_uci(csv_path=CSV_PATH):
+    # The UCI dataset uses ';' as a separator, not ','
+    df = pd.read_csv(csv_path, sep=';')
+    # We map UCI column names to our API's expected names
+    X = df[['studytime', 'failures', 'absences', 'freetime', 'health', 'Dalc']].copy()
+    X.columns = FEATURES
+    # In UCI, G3 is the final grade (0-20). < 10 is a Fail -> Burnout Risk = 1
+    y = (df['G3'] < 10).astype(int).to_numpy()
+    return X, y
+
+def load_synthetic(size=1000, seed=42):
+    # Simulated students over the same columns and ranges as the API
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({f: rng.integers(lo, hi + 1, size) for f, (lo, hi) in FEATURE_RANGES.items()})
+    X['absences'] = rng.integers(0, 20, size)  # Realistic absences, not uniform up to 93
+    # Logic: High failures + High absences + Low study + Heavy drinking = Burnout
     y = np.where(
-        (X['failures'] > 0) | (X['absences'] > 10) | (X['study_time'] == 1), 
+        (X['failures'] > 0) | (X['absences'] > 10) | (X['study_time'] == 1) | (X['alcohol_daily'] > 3),
         1, 0
     )
+    return X, y
 
-    # 3. Train XGBoost Model (The "Brain")
-    print("🧠 Training XGBoost Classifier...")
-    model = xgb.XGBClassifier(
-        n_estimators=50,
-        max_depth=3,
-        learning_rate=0.1,
-        objective='binary:logistic'
-    )
-    model.fit(X, y)
+# 3. The Candidates
+def grid_candidates():
+    keys = list(SEARCH_SPACE)
+    return [dict(zip(keys, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+
+def random_candidates(n, seed):
+    rng = np.random.default_rng(seed)
+    candidates = grid_candidates()
+    picks = rng.choice(len(candidates), size=min(n, len(candidates)), replace=False)
+    return [candidates[i] for i in picks]
+
+def make_model(params, seed):
+    # n_jobs=1: the parallelism is across candidates, one core each
+    return xgb.XGBClassifier(**params, objective='binary:logistic', n_jobs=1, random_state=seed)
+
+def model_size(model):
+    return len(model.get_booster().save_raw("json"))
+
+def measure_latency(model, X):
+    """
+    (per-row µs in a large batch, single-row µs through the one-row DataFrame path). Medians of a few runs.
+    """
+    batch = X.sample(LATENCY_ROWS, replace=True, random_state=0)
+    runs = []
+    for _ in range(3):
+        started = time.perf_counter()
+        model.predict_proba(batch)
+        runs.append((time.perf_counter() - started) / len(batch))
+    singles = []
+    for i in range(50):
+        row = X.iloc[[i % len(X)]]
+        started = time.perf_counter()
+        model.predict_proba(row)
+        singles.append(time.perf_counter() - started)
+    return float(np.median(runs) * 1e6), float(np.median(singles) * 1e6)
+
+def measure_table_build(model):
+    # What load_doctor() does before a new version takes traffic
+    started = time.perf_counter()
+    table = RiskTable.compile(model)
+    mismatches = verify(model, table, samples=VERIFY_SAMPLES)
+    if mismatches:
+        print(f"⚠️ Risk table disagrees with the model on {mismatches}/{VERIFY_SAMPLES} samples: the API would serve it uncompiled.")
+    return time.perf_counter() - started
+
+def evaluate(params, X, y, folds, seed):
+    # Runs in a worker process: k-fold CV, then the size of a model fit on every row.
+    # No timing here: the other workers share the cores, so latencies would be measured under contention.
+    accuracies, aucs = [], []
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for train_ix, test_ix in splitter.split(X, y):
+        model = make_model(params, seed).fit(X.iloc[train_ix], y[train_ix])
+        probabilities = model.predict_proba(X.iloc[test_ix])[:, 1]
+        accuracies.append(accuracy_score(y[test_ix], probabilities > 0.5))
+        aucs.append(roc_auc_score(y[test_ix], probabilities))
+    model = make_model(params, seed).fit(X, y)
+    return {
+        "params": params,
+        "accuracy": float(np.mean(accuracies)),
+        "accuracy_std": float(np.std(accuracies)),
+        "auc": float(np.mean(aucs)),
+        "auc_std": float(np.std(aucs)),
+        "size_bytes": model_size(model),
+    }
+
+def search(X, y, candidates, folds, workers, seed):
+    results = []
+    started = time.perf_counter()
+    # 'spawn' keeps XGBoost's thread pools out of the children (same as the API's process pools)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(evaluate, params, X, y, folds, seed) for params in candidates]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            print(f"   [{done}/{len(candidates)}] {result['params']} -> AUC {result['auc']:.3f}, "
+                  f"acc {result['accuracy']:.3f}, {result['size_bytes'] // 1024} KB")
+    print(f"⏱️  Search took {time.perf_counter() - started:.1f}s.")
+    return results
+
+# 4. The Choice: best AUC (then accuracy, then smaller) among models within the latency budgets
+def rank(r):
+    return (round(r["auc"], 3), round(r["accuracy"], 3), -r["size_bytes"])
+
+def within_budget(r, latency_budget_us, table_budget_s):
+    return r["latency_us_per_row"] <= latency_budget_us and r["table_build_s"] <= table_budget_s
+
+def select(results, X, y, seed, latency_budget_us, table_budget_s):
+    """
+    Refits and times candidates one at a time, best-ranked first, in this process with nothing else running.
+    The first one within both budgets is the best that fits. Returns (result, fitted model), or (None, None).
+    """
+    print(f"⏱️  Timing candidates in rank order (budgets: {latency_budget_us} µs/row, {table_budget_s} s table build)...")
+    for r in sorted(results, key=rank, reverse=True):
+        model = make_model(r["params"], seed).fit(X, y)
+        r["latency_us_per_row"], r["latency_us_single_row"] = measure_latency(model, X)
+        r["table_build_s"] = measure_table_build(model)
+        print(f"   {r['params']} -> {r['latency_us_per_row']:.2f} µs/row, table {r['table_build_s']:.2f}s")
+        if within_budget(r, latency_budget_us, table_budget_s):
+            return r, model
+    return None, None
+
+def print_leaderboard(results, best, top=10):
+    print(f"{'AUC':>6} {'acc':>6} {'µs/row':>7} {'µs/1':>7} {'table s':>7} {'KB':>5}  params")
+    timed = lambda r, key, fmt: format(r[key], fmt) if key in r else "-"
+    for r in sorted(results, key=lambda r: -r["auc"])[:top]:
+        marker = "👉" if r is best else "  "
+        print(f"{r['auc']:>6.3f} {r['accuracy']:>6.3f} {timed(r, 'latency_us_per_row', '.2f'):>7} {timed(r, 'latency_us_single_row', '.0f'):>7} "
+              f"{timed(r, 'table_build_s', '.2f'):>7} {r['size_bytes'] // 1024:>5} {marker}{r['params']}")
+
+# 5. The Pipeline
+def train(data="uci", csv_path=CSV_PATH, search_kind="grid", n_iter=20, folds=5, workers=None,
+          latency_budget_us=LATENCY_BUDGET_US, seed=42, publish=True, table_budget_s=TABLE_BUILD_BUDGET_S):
+    print(f"👨‍⚕️ The Doctor is studying ({data} data)...")
+    if data == "uci":
+        if not os.path.exists(csv_path):
+            print(f"❌ Error: {csv_path} not found in data folder!")
+            return None
+        X, y = load_uci(csv_path)
+    else:
+        X, y = load_synthetic(seed=seed)
+    print(f"✅ Loaded {len(X)} student records ({y.mean():.0%} at risk).")
+
+    candidates = grid_candidates() if search_kind == "grid" else random_candidates(n_iter, seed)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    print(f"🧠 Trying {len(candidates)} XGBoost candidates with {folds}-fold CV on {workers} worker(s)...")
+    results = search(X, y, candidates, folds, workers, seed)
+
+    best, model = select(results, X, y, seed, latency_budget_us, table_budget_s)
+    print_leaderboard(results, best)
+    if best is None:
+        # Shipping a model that blows the budget would only move the problem to the API
+        print(f"❌ No candidate meets {latency_budget_us} µs/row and a {table_budget_s} s table build. Nothing published: "
+              f"raise --latency-budget-us / --table-budget-s or shrink SEARCH_SPACE.")
+        return None
+
+    # The winner was refit on every row and timed above: that is exactly what we ship
+    batch_us, single_us = best["latency_us_per_row"], best["latency_us_single_row"]
+    metadata = {
+        "features": FEATURES,
+        "params": best["params"],
+        "metrics": {
+            "cv_folds": folds,
+            "accuracy": best["accuracy"],
+            "accuracy_std": best["accuracy_std"],
+            "auc": best["auc"],
+            "auc_std": best["auc_std"],
+            "latency_us_per_row": batch_us,
+            "latency_us_single_row": single_us,
+            "table_build_s": best["table_build_s"],
+            "size_bytes": model_size(model),
+        },
+        "latency_budget_us": latency_budget_us,
+        "table_build_budget_s": table_budget_s,
+        "dataset": {"kind": data, "path": csv_path if data == "uci" else None, "rows": len(X), "positive_rate": float(y.mean())},
+        "search": {"kind": search_kind, "candidates": results},
+    }
+    if not publish:
+        print(json.dumps(metadata["metrics"], indent=2))
+        return None
+    version = model_registry.publish("doctor", model.save_model, metadata)
+    print(f"✅ Doctor Model published as: doctor {version} (AUC {best['auc']:.3f}, {batch_us:.2f} µs/row)")
+    return version
 
-    # 4. Save the Model
-    model.save_model(MODEL_PATH)
-    print(f"✅ Doctor Model saved to: {MODEL_PATH}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, benchmark and publish the Burnout Doctor.")
+    parser.add_argument("--data", choices=["uci", "synthetic"], default="uci")
+    parser.add_argument("--csv", default=CSV_PATH, help="UCI student-mat.csv (';' separated)")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=20, help="Candidates for --search random")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--latency-budget-us", type=float, default=LATENCY_BUDGET_US)
+    parser.add_argument("--table-budget-s", type=float, default=TABLE_BUILD_BUDGET_S, help="RiskTable compile + verify on hot swap")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-publish", action="store_true", help="Report only, don't write to the registry")
+    args = parser.parse_args(argv)
+    return train(args.data, args.csv, args.search, args.n_iter, args.folds, args.workers,
+                 args.latency_budget_us, args.seed, publish=not args.no_publish, table_budget_s=args.table_budget_s)
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+# /ask with the frontend's "[User Context: ...]" prefix: the answer is written for one student and must stay theirs.
+import pytest
+
+pytest.importorskip("langchain_huggingface")  # chat_router -> retrieval -> embeddings
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from src.brain.routers import chat_router
+from src.brain.librarian.answer_cache import SemanticAnswerCache
+
+RULE = Document(page_content="A student may re-appear for a failed course in the next supplementary exam.", id="rule-1")
+QUESTION = "Can I write the re-exam?"
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, messages):
+        self.calls += 1
+        return {"message": {"content": f"Answer {self.calls} to: {messages[-1]['content']}"}, "prompt_eval_count": 10}
+
+@pytest.fixture
+def ask(monkeypatch):
+    searched, llm = [], FakeLLM()
+    def search_with_vector(question, request):
+        searched.append(question)
+        return [1.0, 0.0, 0.0], [RULE]  # Same embedding and evidence for every phrasing: only the context differs
+    monkeypatch.setattr(chat_router, "search_with_vector", search_with_vector)
+    monkeypatch.setattr(chat_router, "llm", llm)
+    monkeypatch.setattr(chat_router, "answer_cache", SemanticAnswerCache(max_entries=8))
+    monkeypatch.setattr(chat_router, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(chat_router, "collection_version", lambda: "v1")
+    app = FastAPI()
+    app.include_router(chat_router.router)
+    client = TestClient(app)
+    return lambda question: client.post("/ask", json={"question": question}).json(), searched, llm
+
+def profile(name, sgpa, failures):
+    return f"[User Context: Name={name}, SGPA={sgpa}, Failures={failures}] "
+
+def test_split_user_context():
+    assert chat_router.split_user_context(profile("Asha", 8.2, 0) + QUESTION) == ("[User Context: Name=Asha, SGPA=8.2, Failures=0]", QUESTION)
+    assert chat_router.split_user_context(QUESTION) == ("", QUESTION)
+
+def test_two_profiles_never_share_an_answer(ask):
+    post, searched, llm = ask
+    first = post(profile("Asha", 8.2, 0) + QUESTION)
+    second = post(profile("Ravi", 4.1, 3) + QUESTION)
+    assert not first["cached"] and not second["cached"]
+    assert "Asha" in first["answer"] and "Ravi" in second["answer"]
+    assert llm.calls == 2
+    assert searched == [QUESTION, QUESTION]  # Retrieval sees the bare question
+
+def test_personal_answers_are_not_stored(ask):
+    post, _, llm = ask
+    post(profile("Asha", 8.2, 0) + QUESTION)
+    assert not post(QUESTION)["cached"]  # Asha's answer never reached the cache
+    assert post(QUESTION)["cached"]      # Anonymous questions still share one
+    assert llm.calls == 2
+def test_context_is_built_for_the_bare_question(ask, monkeypatch):
+    post, _, llm = ask
+    built = []
+    build_context = chat_router.build_context
+    monkeypatch.setattr(chat_router, "build_context", lambda question, texts: built.append(question) or build_context(question, texts))
+    answer = post(profile("Asha", 8.2, 0) + QUESTION)["answer"]
+    assert built == [QUESTION]  # Profile words like 'Failures' don't steer which rule sentences are kept
+    assert "Asha" in answer     # ...but the LLM still sees who is asking
\ No newline at end of file
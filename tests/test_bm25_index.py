@@ -0,0 +1,83 @@
+# The BM25 index cards: tokenizer, ranking, incremental writes and the JSON round trip.
+import os
+from langchain_core.documents import Document
+
+from src.brain.librarian.bm25_index import BM25Index, BM25Writer, tokenize
+
+def chunk(cid, text):
+    return Document(page_content=text, metadata={"chunk_id": cid, "source": "rules.pdf"})
+
+RULES = [
+    chunk("attendance", "Attendance below 85 percent in a course bars the student from the semester end exam."),
+    chunk("re-exam", "A student who fails a course may re-appear in the supplementary exam."),
+    chunk("lab", "BCSL404 is the analysis of algorithms lab, assessed under clause 6.1.2."),
+    chunk("grace", "Grace marks of up to 5 are awarded under clause 6.1 for one course."),
+]
+
+def build(path, docs=RULES):
+    writer = BM25Writer(path=str(path))
+    writer.add(docs)
+    writer.save()
+    return BM25Index(path=str(path))
+
+def ids(docs):
+    return [doc.id for doc in docs]
+
+def test_tokenizer_keeps_clauses_and_codes_whole():
+    assert tokenize("What does clause 6.1.2 say about BCSL404?") == ["clause", "6.1.2", "say", "about", "bcsl404"]
+    assert tokenize("Form 220B, section 6.") == ["form", "220b", "section", "6"]
+
+def test_exact_codes_and_clauses_rank_first(tmp_path):
+    index = build(tmp_path / "bm25.json")
+    assert ids(index.search("BCSL404 lab"))[0] == "lab"
+    assert ids(index.search("6.1.2")) == ["lab"]  # "6.1" is a different token
+    assert ids(index.search("6.1")) == ["grace"]
+    assert ids(index.search("clause 6.1.2")) == ["lab", "grace"]
+    assert index.search("hostel fees") == []
+
+def test_rarer_terms_weigh_more(tmp_path):
+    index = build(tmp_path / "bm25.json")
+    # "exam" is in two chunks, "supplementary" in one
+    assert ids(index.search("supplementary exam")) == ["re-exam", "attendance"]
+    assert ids(index.search("exam")) == ["re-exam", "attendance"]  # Same tf: the shorter chunk wins
+
+def test_add_delete_and_re_add(tmp_path):
+    path = tmp_path / "bm25.json"
+    index = build(path)
+    writer = BM25Writer(path=str(path))
+    assert set(writer.docs) == {"attendance", "re-exam", "lab", "grace"}
+
+    writer.delete(["lab", "missing"])
+    writer.save()
+    assert index.search("BCSL404") == []
+
+    writer.add([chunk("lab", "BCSL404 is now assessed under clause 7.2.")])
+    writer.save()
+    hits = index.search("BCSL404")
+    assert ids(hits) == ["lab"] and "7.2" in hits[0].page_content
+    assert index.search("6.1.2") == []  # The old text's terms went with it
+
+def test_unchanged_writer_does_not_rewrite(tmp_path):
+    path = tmp_path / "bm25.json"
+    build(path)
+    before = os.stat(path).st_mtime_ns
+    writer = BM25Writer(path=str(path))
+    writer.delete(["missing"])
+    writer.add([])
+    writer.save()
+    assert os.stat(path).st_mtime_ns == before
+
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / "index" / "bm25.json"  # save() creates the directory
+    build(path)
+    reloaded = BM25Writer(path=str(path))
+    assert set(reloaded.docs) == {"attendance", "re-exam", "lab", "grace"}
+    assert reloaded.docs["lab"]["tf"]["bcsl404"] == 1
+    hits = BM25Index(path=str(path)).search("grace marks")
+    assert ids(hits) == ["grace"]
+    assert hits[0].metadata == {"chunk_id": "grace", "source": "rules.pdf"}
+
+def test_missing_or_corrupt_file_is_empty(tmp_path):
+    assert BM25Index(path=str(tmp_path / "none.json")).search("exam") == []
+    (tmp_path / "bad.json").write_text("{not json")
+    assert BM25Writer(path=str(tmp_path / "bad.json")).docs == {}
\ No newline at end of file
@@ -0,0 +1,47 @@
+# What chat_router puts in the system prompt: retrieved chunks, de-overlapped, de-duplicated and trimmed to a budget.
+from src.brain.librarian.context_builder import build_context, clean_chunks, overlap_size, estimate_tokens
+
+SHARED = "A candidate who fails may re-appear in the supplementary examination."
+FIRST = "Attendance of 85 percent is mandatory for every course. " + SHARED
+SECOND = SHARED + " The re-appearance fee is 500 rupees per course."
+
+def test_overlap_between_neighbouring_chunks_is_kept_once():
+    assert overlap_size(FIRST, SECOND) == len(SHARED)
+    context = build_context("supplementary examination fee", [FIRST, SECOND])
+    assert context.text.count(SHARED) == 1
+    assert "500 rupees" in context.text and "85 percent" in context.text
+    assert context.chunks_used == 2
+
+def test_either_chunk_may_rank_first():
+    kept, _ = clean_chunks([SECOND, FIRST])
+    assert kept[0] == SECOND
+    assert SHARED not in kept[1]
+
+def test_near_duplicates_are_dropped():
+    # The same clause from two editions of the handbook: only the last word differs
+    clause = ("Attendance of 85 percent in each course is mandatory and students below it are not permitted to write "
+              "the semester end examination of that course unless the principal condones the shortage on medical grounds ")
+    original, reworded = clause + "only.", clause + "alone."
+    context = build_context("attendance", [original, reworded, "Grace marks are capped at 10."])
+    assert context.duplicates_dropped == 1
+    assert context.chunks_used == 2
+    assert reworded not in context.text
+
+def test_budget_keeps_the_sentences_that_answer_the_question():
+    chunk = " ".join([
+        "The library opens at 8 am.",
+        "Grace marks of up to 10 may be awarded for a failed course.",
+        "Hostel rooms are allotted in July.",
+        "Grace marks are not awarded for laboratory courses.",
+        "The canteen serves lunch from noon.",
+    ])
+    budget = estimate_tokens("Grace marks of up to 10 may be awarded for a failed course.") + estimate_tokens("Grace marks are not awarded for laboratory courses.") + 2
+    context = build_context("Can I get grace marks for a failed course?", [chunk], budget=budget)
+    # Best matches first, then put back in the order the handbook has them
+    assert context.text == "Grace marks of up to 10 may be awarded for a failed course. Grace marks are not awarded for laboratory courses."
+    assert context.sentences_kept == 2 and context.sentences_total == 5
+    assert context.tokens <= budget
+
+def test_no_chunks():
+    context = build_context("anything", [])
+    assert context.text == "" and context.chunks_used == 0 and context.tokens == 0
\ No newline at end of file
@@ -0,0 +1,92 @@
+# Cohort screening endpoints with a small in-memory model: no registry, no trained Doctor needed.
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.brain.routers import doctor_router
+from src.brain.toolbelt import risk_table as risk
+from src.brain.toolbelt.model_registry import Served
+
+def students(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(risk.LOWS, risk.HIGHS + 1, size=(n, len(risk.FEATURES))), columns=risk.FEATURES)
+
+@pytest.fixture(scope="module")
+def model():
+    frame = students(300)
+    at_risk = (frame["failures"] * 2 + frame["absences"] / 20 - frame["study_time"]) > 2
+    classifier = xgb.XGBClassifier(n_estimators=10, max_depth=3, objective="binary:logistic", n_jobs=1, random_state=0)
+    return classifier.fit(frame, at_risk.astype(int))
+
+@pytest.fixture
+def client(model, monkeypatch):
+    served = Served("v-test", {}, doctor_router.Doctor(model, None))
+    monkeypatch.setattr(doctor_router, "on_duty", lambda: served)
+    monkeypatch.setattr(doctor_router, "DOCTOR_BATCH_CHUNK_ROWS", 7)  # Most blocks are read after the handler returned
+    app = FastAPI()
+    app.include_router(doctor_router.router)
+    return TestClient(app)
+
+def upload(frame):
+    return {"file": ("cohort.csv", frame.to_csv(index=False).encode(), "text/csv")}
+
+def test_batch_csv_streams_every_block(client, model):
+    cohort = students(50, seed=1)
+    response = client.post("/predict_burnout/batch_csv", files=upload(cohort))
+    assert response.status_code == 200
+    assert response.headers["x-model-version"] == "v-test"
+    screened = pd.read_csv(io.StringIO(response.text))
+    assert len(screened) == 50
+    pd.testing.assert_frame_equal(screened[risk.FEATURES], cohort)
+    expected = np.round(model.predict_proba(cohort)[:, 1].astype(np.float64), 4)
+    np.testing.assert_allclose(screened["risk_probability"], expected, atol=1e-4)
+
+def test_batch_csv_outlives_the_upload(client, monkeypatch):
+    # FastAPI versions that close the UploadFile when the handler returns: the stream reads our spool instead
+    spool_upload = doctor_router.spool_upload
+    def spool_and_close(upload):
+        spool = spool_upload(upload)
+        upload.close()
+        return spool
+    monkeypatch.setattr(doctor_router, "spool_upload", spool_and_close)
+    response = client.post("/predict_burnout/batch_csv", files=upload(students(50, seed=4)))
+    assert len(pd.read_csv(io.StringIO(response.text))) == 50
+
+def test_batch_csv_as_json(client):
+    response = client.post("/predict_burnout/batch_csv?format=json", files=upload(students(20, seed=2)))
+    body = response.json()
+    assert body["count"] == 20 and len(body["results"]) == 20
+
+def test_batch_csv_rejects_a_bad_file(client):
+    response = client.post("/predict_burnout/batch_csv", files={"file": ("cohort.csv", b"study_time,failures\n1,2\n", "text/csv")})
+    assert response.status_code == 400
+    assert "Missing columns" in response.json()["detail"]
+
+def test_json_batch(client):
+    cohort = students(5, seed=3)
+    response = client.post("/predict_burnout/batch", json=cohort.to_dict(orient="records"))
+    assert response.json()["count"] == 5
+
+def malformed(rows, bad_row):
+    # One row with an extra field: the C parser only notices when it reaches that block
+    lines = students(rows, seed=5).to_csv(index=False).splitlines()
+    lines[bad_row + 1] += ",99"
+    return {"file": ("cohort.csv", ("\n".join(lines) + "\n").encode(), "text/csv")}
+
+def test_batch_csv_marks_a_malformed_row_past_the_first_block(client):
+    response = client.post("/predict_burnout/batch_csv", files=malformed(30, bad_row=20))
+    assert response.status_code == 200
+    body = response.text.splitlines()
+    assert body[-1].startswith("# error: Could not read CSV")
+    assert len(body) - 2 == 14  # Header, the two good blocks, then the marker
+
+def test_batch_csv_as_json_rejects_a_malformed_row_past_the_first_block(client):
+    response = client.post("/predict_burnout/batch_csv?format=json", files=malformed(30, bad_row=20))
+    assert response.status_code == 400
+    assert "Could not read CSV" in response.json()["detail"]
\ No newline at end of file
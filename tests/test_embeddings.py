@@ -0,0 +1,105 @@
+# The embedding micro-batcher against a stub model that records every batch it is handed.
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("langchain_huggingface")  # embeddings imports the real model class
+
+from src.brain.librarian.embeddings import BatchingEmbeddings
+
+def vector(text):
+    return [float(len(text)), float(sum(map(ord, text)))]
+
+class StubModel:
+    """Vectors derived from the text; optionally holds its first call until released, or fails."""
+
+    def __init__(self, hold_first=False):
+        self.batches = []
+        self.fail = False
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        self.entered.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("CUDA out of memory")
+        return [vector(text) for text in texts]
+
+def ask_all(ask, texts):
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        return list(pool.map(ask, texts))
+
+def wait_for_queue(batcher, size):
+    deadline = time.monotonic() + 5
+    while batcher._queue.qsize() < size and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def test_batches_are_capped():
+    model = StubModel(hold_first=True)
+    batcher = BatchingEmbeddings(model, max_batch=4, max_wait_ms=300)
+    with ThreadPoolExecutor(max_workers=11) as pool:
+        first = pool.submit(batcher.embed_query, "q0")
+        model.entered.wait(5)  # q0 is being embedded; everyone else queues behind it
+        rest = [pool.submit(batcher.embed_query, f"q{i}") for i in range(1, 11)]
+        wait_for_queue(batcher, 10)
+        model.release.set()
+        assert [f.result() for f in [first] + rest] == [vector(f"q{i}") for i in range(11)]
+    # Full batches go at once; only the last one waits out the window
+    assert [len(batch) for batch in model.batches] == [1, 4, 4, 2]
+
+def test_queries_within_the_wait_window_share_a_call():
+    model = StubModel()
+    batcher = BatchingEmbeddings(model, max_batch=32, max_wait_ms=300)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(batcher.embed_query, "attendance rules")
+        time.sleep(0.05)
+        second = pool.submit(batcher.embed_query, "re-exam rules")
+        assert first.result() == vector("attendance rules")
+        assert second.result() == vector("re-exam rules")
+    assert model.batches == [["attendance rules", "re-exam rules"]]
+
+def test_lone_query_waits_at_most_the_window():
+    model = StubModel()
+    batcher = BatchingEmbeddings(model, max_batch=32, max_wait_ms=20)
+    started = time.monotonic()
+    assert batcher.embed_query("grace marks") == vector("grace marks")
+    assert time.monotonic() - started < 1
+    assert model.batches == [["grace marks"]]
+
+def test_each_caller_gets_its_own_vector():
+    model = StubModel()
+    batcher = BatchingEmbeddings(model, max_batch=5, max_wait_ms=50)
+    texts = [f"question number {i}" * (i % 3 + 1) for i in range(23)]
+    assert ask_all(batcher.embed_query, texts) == [vector(text) for text in texts]
+    assert sorted(text for batch in model.batches for text in batch) == sorted(texts)
+    assert max(len(batch) for batch in model.batches) <= 5
+
+def test_a_failed_batch_fails_every_waiter_and_the_worker_survives():
+    model = StubModel()
+    model.fail = True
+    batcher = BatchingEmbeddings(model, max_batch=3, max_wait_ms=5000)  # Three callers fill exactly one batch
+
+    def ask(text):
+        try:
+            return batcher.embed_query(text)
+        except RuntimeError as e:
+            return str(e)
+
+    assert ask_all(ask, ["a", "b", "c"]) == ["CUDA out of memory"] * 3
+    assert len(model.batches) == 1
+
+    model.fail = False
+    assert ask_all(batcher.embed_query, ["d", "e", "f"]) == [vector("d"), vector("e"), vector("f")]
+
+def test_documents_go_straight_to_the_model():
+    model = StubModel()
+    batcher = BatchingEmbeddings(model, max_batch=2)
+    assert batcher.embed_documents(["a", "b", "c"]) == [vector("a"), vector("b"), vector("c")]
+    assert model.batches == [["a", "b", "c"]]
+    assert batcher._worker is None
\ No newline at end of file
@@ -0,0 +1,145 @@
+# BoundedPool admission, per-lease windows, slot release and recovery from a crashed executor.
+import time
+import asyncio
+import threading
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+from src.brain.toolbelt import metrics
+from src.brain.toolbelt.executors import BoundedPool
+
+def counter(name):
+    return metrics.snapshot()["counters"].get(name, 0)
+
+class Tracker:
+    """A blocking job that records how many copies of itself run at once."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return value * 2
+
+class CrashedExecutor(Executor):
+    """Stands in for a process pool whose worker died: every job fails with BrokenProcessPool."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+@pytest.fixture
+def pool():
+    pool = BoundedPool("test", kind="thread", max_workers=2, max_queue=3, retry_after=7)
+    yield pool
+    pool.shutdown()
+
+def test_admit_turns_away_beyond_workers_plus_queue(pool):
+    big = pool.admit(10)  # Capped at max_workers slots
+    assert big.slots == 2
+    pool.admit(2)
+    last = pool.admit(1)
+    assert pool.stats()["inflight"] == 5
+
+    rejected = counter("pool.test.rejected")
+    with pytest.raises(HTTPException) as e:
+        pool.admit(1)
+    assert e.value.status_code == 429
+    assert e.value.headers == {"Retry-After": "7"}
+    assert counter("pool.test.rejected") == rejected + 1
+    assert pool.stats()["inflight"] == 5  # A rejected request holds nothing
+
+    last.release()
+    pool.admit(1)
+
+def test_lease_runs_at_most_its_slots():
+    pool = BoundedPool("wide", kind="thread", max_workers=4, max_queue=0)
+    job = Tracker()
+    try:
+        async def main():
+            with pool.admit(2) as lease:
+                return await lease.map(job, [(i,) for i in range(6)])
+        assert asyncio.run(main()) == [0, 2, 4, 6, 8, 10]
+    finally:
+        pool.shutdown()
+    assert job.max_active == 2
+
+def test_pool_map_feeds_at_most_max_workers(pool):
+    job = Tracker()
+    assert asyncio.run(pool.map(job, [(i,) for i in range(5)])) == [0, 2, 4, 6, 8]
+    assert job.max_active == 2
+    assert pool.stats()["inflight"] == 0
+
+def test_slots_released_on_exit_even_after_an_error(pool):
+    with pool.admit(2) as lease:
+        assert pool.stats()["inflight"] == 2
+    assert pool.stats()["inflight"] == 0
+    lease.release()  # Idempotent
+    assert pool.stats()["inflight"] == 0
+
+    with pytest.raises(ValueError):
+        with pool.admit(1):
+            raise ValueError("boom")
+    assert pool.stats()["inflight"] == 0
+
+def test_streaming_response_releases_from_its_background_task(pool):
+    app = FastAPI()
+    seen = []
+
+    async def release(lease):
+        lease.release()
+
+    async def lines(lease):
+        for i in range(3):
+            seen.append(pool.stats()["inflight"])
+            yield f"{await lease.execute(Tracker(0), i)}\n"
+
+    @app.get("/stream")
+    async def stream():
+        lease = pool.admit(2)
+        return StreamingResponse(lines(lease), media_type="text/plain", background=BackgroundTask(release, lease))
+
+    with TestClient(app) as client:
+        response = client.get("/stream")
+        assert response.text == "0\n2\n4\n"
+        assert seen == [2, 2, 2]  # Held for the whole stream
+        assert pool.stats()["inflight"] == 0
+
+def test_broken_executor_is_replaced_and_answers_503(pool):
+    crashed = CrashedExecutor()
+    pool._executor = crashed
+    broken = counter("pool.test.broken")
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(pool.run(Tracker(0), 1))
+    assert e.value.status_code == 503
+    assert "crashed" in e.value.detail
+    assert crashed.shut_down
+    assert pool.stats()["started"] is False
+    assert counter("pool.test.broken") == broken + 1
+    assert pool.stats()["inflight"] == 0
+
+    # The next request gets a fresh executor
+    assert asyncio.run(pool.run(Tracker(0), 21)) == 42
+    assert pool._executor is not crashed
\ No newline at end of file
@@ -0,0 +1,169 @@
+# ingest.py end to end on the local backend: tiny PDFs, a stub embedder in threads, everything under tmp_path.
+import json
+import functools
+
+import fitz
+import numpy as np
+import pytest
+
+for module in ("psycopg", "pgvector", "langchain_postgres", "langchain_text_splitters", "langchain_huggingface"):
+    pytest.importorskip(module)  # ingest imports the pgvector writer, the splitter and the embedding model
+
+from src.brain.librarian import ingest
+from src.brain.librarian.bm25_index import BM25Writer
+from src.brain.librarian.local_index import LocalWriter
+from src.brain.toolbelt.executors import BoundedPool
+
+def write_pdf(path, pages):
+    # One short line per page: one chunk per page with any splitter settings
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+class Corpus:
+    def __init__(self, root):
+        self.root = root
+        self.docs = root / "docs"
+        self.docs.mkdir()
+        self.index_dir = root / "index"
+        self.bm25_file = root / "bm25.json"
+        self.manifest_file = root / "manifest.json"
+        self.embedded = []  # One list of texts per embedding call
+
+    def embed(self, texts):
+        self.embedded.append(list(texts))
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+    def pdf(self, name, pages):
+        write_pdf(self.docs / name, pages)
+
+    def sync(self):
+        self.embedded.clear()
+        ingest.main(str(self.docs))
+
+    def stored(self):
+        return {cid: document for cid, (_, document, _) in LocalWriter(index_dir=str(self.index_dir)).rows.items()}
+
+    def lexical(self):
+        return set(BM25Writer(path=str(self.bm25_file)).docs)
+
+    def manifest(self):
+        with open(self.manifest_file, encoding="utf-8") as f:
+            return json.load(f)
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    corpus = Corpus(tmp_path)
+    monkeypatch.setattr(ingest, "RETRIEVAL_BACKEND", "local")
+    monkeypatch.setattr(ingest, "MANIFEST_FILE", str(corpus.manifest_file))
+    monkeypatch.setattr(ingest, "INGEST_BATCH", 2)
+    monkeypatch.setattr(ingest, "LocalWriter", functools.partial(LocalWriter, index_dir=str(corpus.index_dir)))
+    monkeypatch.setattr(ingest, "BM25Writer", functools.partial(BM25Writer, path=str(corpus.bm25_file)))
+    monkeypatch.setattr(ingest, "mark_collection_changed", lambda: None)
+    monkeypatch.setattr(ingest, "embed_pool", BoundedPool("embed-test", kind="thread", max_workers=2, max_queue=0))
+    monkeypatch.setattr(ingest, "_embed_batch", corpus.embed)
+    return corpus
+
+def test_bm25_is_rebuilt_from_the_stored_chunks(corpus):
+    corpus.pdf("rules.pdf", ["Attendance below 85 percent", "Clause 6.1.2 on grace marks", "BCSL404 lab assessment"])
+    corpus.sync()
+    stored = corpus.stored()
+    assert len(stored) == 3 and corpus.lexical() == set(stored)
+
+    corpus.bm25_file.unlink()  # Lost, or saved before a run crashed
+    corpus.sync()
+    assert corpus.embedded == []  # Rebuilt from the store, not re-embedded
+    assert corpus.lexical() == set(stored)
+    assert BM25Writer(path=str(corpus.bm25_file)).docs[next(iter(stored))]["document"] == next(iter(stored.values()))
+
+def test_unchanged_corpus_embeds_nothing(corpus):
+    corpus.pdf("rules.pdf", ["Attendance below 85 percent", "Clause 6.1.2 on grace marks", "BCSL404 lab assessment"])
+    corpus.pdf("exams.pdf", ["Supplementary exam in July"])
+    corpus.sync()
+    assert sorted(text for batch in corpus.embedded for text in batch) == sorted(corpus.stored().values())
+    index_files = sorted(p.name for p in corpus.index_dir.iterdir())
+
+    corpus.sync()
+    assert corpus.embedded == []
+    assert sorted(p.name for p in corpus.index_dir.iterdir()) == index_files  # No new generation written
+
+def test_edited_file_deletes_only_its_stale_chunks(corpus):
+    corpus.pdf("rules.pdf", ["Attendance below 85 percent", "Clause 6.1.2 on grace marks", "BCSL404 lab assessment"])
+    corpus.pdf("exams.pdf", ["Supplementary exam in July"])
+    corpus.sync()
+    before = corpus.stored()
+    manifest = corpus.manifest()["documents"]
+
+    corpus.pdf("rules.pdf", ["Attendance below 85 percent", "Clause 6.1.2 on grace marks", "BCSL405 lab assessment"])
+    corpus.sync()
+    after = corpus.stored()
+    assert corpus.embedded == [["BCSL405 lab assessment"]]  # Only the new chunk
+    gone, added = set(before) - set(after), set(after) - set(before)
+    assert [before[cid] for cid in gone] == ["BCSL404 lab assessment"]
+    assert [after[cid] for cid in added] == ["BCSL405 lab assessment"]
+    assert corpus.manifest()["documents"]["exams.pdf"] == manifest["exams.pdf"]
+    assert set(corpus.manifest()["documents"]["rules.pdf"]["chunk_ids"]) == set(after) - set(manifest["exams.pdf"]["chunk_ids"])
+    assert corpus.lexical() == set(after)
+
+def test_removed_file_deletes_its_chunks(corpus):
+    corpus.pdf("rules.pdf", ["Attendance below 85 percent"])
+    corpus.pdf("exams.pdf", ["Supplementary exam in July"])
+    corpus.sync()
+    (corpus.docs / "exams.pdf").unlink()
+    corpus.sync()
+    assert corpus.embedded == []
+    assert list(corpus.stored().values()) == ["Attendance below 85 percent"]
+    assert set(corpus.manifest()["documents"]) == {"rules.pdf"}
+    assert corpus.lexical() == set(corpus.stored())
+
+class DurableWriter(LocalWriter):
+    """A LocalWriter that claims every write() is committed, like the pgvector BulkWriter."""
+    durable = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = set()
+
+    def write(self, docs, vectors):
+        super().write(docs, vectors)
+        self.written.update(doc.metadata["chunk_id"] for doc in docs)
+
+def record_saves(monkeypatch, writers):
+    saves = []
+    save_manifest = ingest.save_manifest
+    def recording_save(manifest):
+        listed = {cid for entry in manifest["documents"].values() for cid in entry["chunk_ids"]}
+        writer = writers[-1]
+        saves.append((listed, set(getattr(writer, "written", ())), writer.dirty))
+        save_manifest(manifest)
+    monkeypatch.setattr(ingest, "save_manifest", recording_save)
+    return saves
+
+def test_manifest_lists_a_file_only_once_its_batches_are_written(corpus, monkeypatch):
+    writers = []
+    def open_durable():
+        writers.append(DurableWriter(index_dir=str(corpus.index_dir)))
+        return writers[-1]
+    monkeypatch.setattr(ingest, "open_writer", open_durable)
+    saves = record_saves(monkeypatch, writers)
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        corpus.pdf(name, [f"{name} rule {i}" for i in range(3)])  # Batches of 2 straddle the files
+
+    corpus.sync()
+    assert len(saves) == 4  # One checkpoint per file, then the final save
+    for listed, written, _ in saves:
+        assert listed <= written
+    assert [len(listed) for listed, _, _ in saves] == [3, 6, 9, 9]
+
+def test_local_writer_saves_the_manifest_after_its_commit(corpus, monkeypatch):
+    writers = []
+    open_writer = ingest.open_writer
+    monkeypatch.setattr(ingest, "open_writer", lambda: writers.append(open_writer()) or writers[-1])
+    saves = record_saves(monkeypatch, writers)
+    corpus.pdf("a.pdf", [f"rule {i}" for i in range(5)])
+
+    corpus.sync()
+    assert len(saves) == 1       # Nothing reaches disk before close(), so no checkpoints
+    assert saves[0][2] is False  # ...and the one save comes after the generation is committed
\ No newline at end of file
@@ -0,0 +1,158 @@
+# OllamaClient against a local stub of Ollama's /api/chat: slots, deadlines, single-flight and stream parsing.
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.brain.toolbelt.llm_client import OllamaClient, LLMError, LLMTimeout
+
+class StubOllama(ThreadingHTTPServer):
+    """
+    Answers every chat with its last message echoed back, after `delay` seconds.
+    Streams are sent as NDJSON: one chunk per word, `gap` seconds apart, then 'done'.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = 0.0
+        self.gap = 0.0
+        self.status = 200
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if server.status != 200:
+                self.send_error(server.status)
+                return
+            question = payload["messages"][-1]["content"]
+            if not payload["stream"]:
+                body = json.dumps({"message": {"role": "assistant", "content": f"re: {question}"}, "prompt_eval_count": 7, "done": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for word in question.split():
+                self.wfile.write((json.dumps({"message": {"content": word + " "}, "done": False}) + "\n\n").encode())
+                self.wfile.flush()
+                time.sleep(server.gap)
+            self.wfile.write((json.dumps({"message": {"content": ""}, "done": True, "prompt_eval_count": 7}) + "\n").encode())
+            self.wfile.write(b'{"after": "done"}\n')  # Never read: the stream ends at 'done'
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (deadline tests)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+@pytest.fixture
+def stub():
+    server = StubOllama()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def ask(text):
+    return [{"role": "user", "content": text}]
+
+def run(stub, scenario, **kwargs):
+    async def main():
+        client = OllamaClient(base_url=stub.url, model="stub", **kwargs)
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+def test_chat(stub):
+    reply = run(stub, lambda client: client.chat(ask("max attempts?")))
+    assert reply["message"]["content"] == "re: max attempts?"
+    assert reply["prompt_eval_count"] == 7
+
+def test_generations_never_exceed_the_parallel_slots(stub):
+    stub.delay = 0.1
+    async def scenario(client):
+        return await asyncio.gather(*[client.chat(ask(f"question {i}")) for i in range(6)])
+    replies = run(stub, scenario, max_concurrency=2)
+    assert [r["message"]["content"] for r in replies] == [f"re: question {i}" for i in range(6)]
+    assert stub.requests == 6
+    assert stub.max_active == 2
+
+def test_identical_concurrent_chats_share_one_generation(stub):
+    stub.delay = 0.1
+    async def scenario(client):
+        return await asyncio.gather(*[client.chat(ask("same question")) for _ in range(5)])
+    replies = run(stub, scenario, max_concurrency=4)
+    assert stub.requests == 1
+    assert all(r == replies[0] for r in replies)
+
+def test_chat_deadline(stub):
+    stub.delay = 2.0
+    started = time.perf_counter()
+    with pytest.raises(LLMTimeout):
+        run(stub, lambda client: client.chat(ask("slow"), timeout=0.2))
+    assert time.perf_counter() - started < 1.5
+
+def test_deadline_covers_the_wait_for_a_slot(stub):
+    stub.delay = 0.5
+    async def scenario(client):
+        first = asyncio.ensure_future(client.chat(ask("first")))
+        await asyncio.sleep(0.05)
+        with pytest.raises(LLMTimeout):
+            await client.chat(ask("second"), timeout=0.2)
+        return await first
+    assert run(stub, scenario, max_concurrency=1)["message"]["content"] == "re: first"
+    assert stub.requests == 1  # The second chat never reached Ollama
+
+def test_http_errors_raise_llm_error(stub):
+    stub.status = 500
+    with pytest.raises(LLMError):
+        run(stub, lambda client: client.chat(ask("boom")))
+
+def test_stream_parsing(stub):
+    async def scenario(client):
+        return [chunk async for chunk in client.stream_chat(ask("you may re-appear twice"))]
+    chunks = run(stub, scenario)
+    assert "".join(c["message"]["content"] for c in chunks) == "you may re-appear twice "
+    assert chunks[-1]["done"] and chunks[-1]["prompt_eval_count"] == 7
+    assert all("after" not in c for c in chunks)
+
+def test_stream_deadline_between_chunks(stub):
+    stub.gap = 1.0
+    async def scenario(client):
+        received = []
+        with pytest.raises(LLMTimeout):
+            async for chunk in client.stream_chat(ask("one two three"), timeout=0.3):
+                received.append(chunk)
+        # The slot is free again: the next stream is not stuck behind the timed-out one
+        await asyncio.wait_for(client._slots.acquire(), 0.1)
+        return received
+    received = run(stub, scenario, max_concurrency=1)
+    assert [c["message"]["content"] for c in received] == ["one "]
\ No newline at end of file
@@ -0,0 +1,69 @@
+# The local (no Postgres) index: ingest.py's LocalWriter commits generations, the API's LocalIndex reads them.
+import os
+import shutil
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src.brain.librarian import local_index
+from src.brain.librarian.local_index import LocalIndex, LocalWriter
+
+def chunk(cid, text):
+    return Document(page_content=text, metadata={"chunk_id": cid, "source": "rules.pdf"})
+
+def commit(index_dir, rows, dtype="float32"):
+    writer = LocalWriter(index_dir=index_dir, dtype=dtype)
+    writer.clear()
+    writer.write([chunk(cid, text) for cid, text, _ in rows], np.array([vector for _, _, vector in rows], dtype=np.float32))
+    writer.close()
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_search_ranks_by_cosine(tmp_path, dtype):
+    commit(str(tmp_path), [("a", "attendance", [1, 0, 0]), ("b", "re-exam", [0, 1, 0]), ("c", "grace marks", [0.6, 0.8, 0])], dtype)
+    hits = LocalIndex(index_dir=str(tmp_path)).search([0.1, 1, 0], k=2)
+    assert [doc.id for doc in hits] == ["b", "c"]
+    assert hits[0].page_content == "re-exam"
+
+def test_new_generation_is_one_snapshot(tmp_path):
+    index = LocalIndex(index_dir=str(tmp_path))
+    assert index.search([1, 0, 0]) == []
+
+    commit(str(tmp_path), [("a", "attendance", [1, 0, 0])])
+    old = index.load()
+    commit(str(tmp_path), [("b", "re-exam", [0, 1, 0]), ("c", "grace marks", [0, 0, 1])])
+    new = index.load()
+
+    # A search that held the old snapshot still sees matching vectors and records
+    assert old.generation != new.generation
+    assert len(old.vectors) == len(old.records) == 1
+    assert len(new.vectors) == len(new.records) == 2
+    assert [doc.id for doc in index.search([0, 0, 1], k=1)] == ["c"]
+
+def test_load_follows_a_generation_removed_mid_read(tmp_path, monkeypatch):
+    index = LocalIndex(index_dir=str(tmp_path))
+    commit(str(tmp_path), [("a", "attendance", [1, 0, 0])])
+
+    read_records = local_index._read_records
+    raced = []
+    def racing_read(gen_dir):
+        if not raced:
+            # ingest.py commits once more between our header read and this one, deleting gen_dir
+            raced.append(gen_dir)
+            commit(str(tmp_path), [("b", "re-exam", [0, 1, 0])])
+        return read_records(gen_dir)
+    monkeypatch.setattr(local_index, "_read_records", racing_read)
+
+    snapshot = index.load()
+    assert raced and snapshot.generation != os.path.basename(raced[0])
+    assert [record["id"] for record in snapshot.records] == ["b"]
+
+def test_load_keeps_serving_when_the_generation_is_gone(tmp_path):
+    index = LocalIndex(index_dir=str(tmp_path))
+    commit(str(tmp_path), [("a", "attendance", [1, 0, 0])])
+    old = index.load()
+    commit(str(tmp_path), [("b", "re-exam", [0, 1, 0])])
+    new_generation = [p for p in tmp_path.iterdir() if p.name.startswith("gen-")]
+    shutil.rmtree(new_generation[0])
+
+    assert index.load() is old
+    assert [doc.id for doc in index.search([1, 0, 0], k=1)] == ["a"]
\ No newline at end of file
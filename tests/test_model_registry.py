@@ -0,0 +1,67 @@
+# Publishing and hot-swapping versions in a throwaway registry.
+import json
+import os
+import pytest
+
+from src.brain.toolbelt import model_registry
+
+@pytest.fixture(autouse=True)
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "REGISTRY_DIR", str(tmp_path))
+    return tmp_path
+
+def writer(text):
+    def save(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return save
+
+def test_publish_numbers_versions_and_moves_current():
+    assert model_registry.publish("doctor", writer("a"), {}) == "v0001"
+    assert model_registry.publish("doctor", writer("b"), {}, activate=False) == "v0002"
+    assert model_registry.list_versions("doctor") == ["v0001", "v0002"]
+    assert model_registry.current_version("doctor") == "v0001"
+    assert model_registry.read_metadata("doctor", "v0002")["version"] == "v0002"
+
+def test_losing_a_version_race_takes_the_next_number(monkeypatch):
+    model_registry.publish("doctor", writer("a"), {})
+    # Another trainer picked the same number in between: our rename finds v0001 taken
+    numbers = iter(["v0001", "v0002"])
+    monkeypatch.setattr(model_registry, "next_version", lambda name: next(numbers))
+    assert model_registry.publish("doctor", writer("b"), {}) == "v0002"
+    assert model_registry.read_metadata("doctor", "v0002")["version"] == "v0002"
+    assert sorted(os.listdir(model_registry.model_dir("doctor"))) == ["CURRENT", "v0001", "v0002"]  # No .tmp- left over
+
+def test_import_legacy_runs_once_across_workers(registry, monkeypatch):
+    legacy = registry / "doctor_model.json"
+    legacy.write_text("legacy")
+    assert model_registry.import_legacy("doctor", str(legacy), {}) == "v0001"
+    # A second worker that checked before the first one finished: the rename tells it v0001 is there
+    monkeypatch.setattr(model_registry, "list_versions", lambda name: [])
+    assert model_registry.import_legacy("doctor", str(legacy), {}) is None
+    assert model_registry.current_version("doctor") == "v0001"
+
+def test_failed_version_is_retried_once_fixed_on_disk():
+    loads = []
+    def load(path, metadata):
+        loads.append(path)
+        with open(path, encoding="utf-8") as f:
+            if f.read() == "broken":
+                raise ValueError("bad artifact")
+        return "model"
+    hot = model_registry.HotModel("doctor", load, lambda model: None)
+    version = model_registry.publish("doctor", writer("broken"), {})
+    assert hot.refresh() is None
+    assert hot.refresh() is None and len(loads) == 1  # Not retried while unchanged
+    assert hot.stats()["failed"] == version
+
+    # Fixed in place: new artifact, matching hash
+    version_dir = os.path.join(model_registry.model_dir("doctor"), version)
+    artifact = os.path.join(version_dir, model_registry.ARTIFACT_NAME)
+    writer("fixed")(artifact)
+    metadata = model_registry.read_metadata("doctor", version)
+    metadata["sha256"] = model_registry.file_hash(artifact)
+    with open(os.path.join(version_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+    assert hot.refresh().version == version
+    assert len(loads) == 2
\ No newline at end of file
@@ -0,0 +1,71 @@
+# /scan_marks_cards with a fake Eye pool: one crashed worker must only fail the file it was reading.
+import numpy as np
+import pytest
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.brain.routers import ocr_router
+from src.brain.routers.ocr_router import OcrTokens
+from src.brain.toolbelt.executors import BoundedPool
+
+def read_page(name, profile="fast"):
+    # A clean one-subject card; the profile that read it is in its page info
+    texts = [f"USN: 1AB22CS{name}", "Subject Code", "Total", "Result", "BCS401", "85", "P"]
+    centres = [(100, 60), (100, 100), (500, 100), (600, 100), (140, 60), (140, 500), (140, 600)]
+    boxes = np.array([[x - 20, y - 6, x + 20, y + 6] for y, x in centres], dtype=np.float32)
+    info = {"region": "table", "cropped": False, "retried": False, "profile": profile, "escalated": profile != "fast"}
+    return OcrTokens(boxes, texts, np.full(len(texts), 0.99, dtype=np.float32), info)
+
+class CrashingExecutor(ThreadPoolExecutor):
+    """
+    A process pool whose worker dies on the pages listed in `crashes` (page args, e.g. ("002", "accurate")).
+    """
+
+    def __init__(self, crashes):
+        super().__init__(max_workers=1)
+        self.crashes = crashes
+
+    def submit(self, fn, *args, **kwargs):
+        _, page_args = fn.args  # functools.partial(_ocr_job, page_func, page_args)
+        if page_args in self.crashes:
+            future = Future()
+            future.set_exception(BrokenProcessPool("A worker died"))
+            return future
+        return super().submit(fn, *args, **kwargs)
+
+@pytest.fixture
+def batch(monkeypatch):
+    pool = BoundedPool("ocr-test", kind="thread", max_workers=1, max_queue=8)
+    monkeypatch.setattr(ocr_router, "ocr_pool", pool)
+    monkeypatch.setattr(ocr_router, "SCAN_CACHE_ENABLED", False)
+    monkeypatch.setattr(ocr_router, "_plan_job", lambda filename, data: (("OCR-Image", None, [(read_page, (filename[:3],))]), None))
+    app = FastAPI()
+    app.include_router(ocr_router.router)
+    client = TestClient(app)
+    def scan(crashes, *names):
+        pool._executor = CrashingExecutor(crashes)
+        files = [("files", (f"{name}.png", name.encode(), "image/png")) for name in names]
+        return client.post("/scan_marks_cards", files=files)
+    yield scan
+    pool.shutdown()
+
+def test_crashed_worker_fails_only_its_file(batch, monkeypatch):
+    monkeypatch.setattr(ocr_router, "escalation_reasons", lambda tokens: set())
+    response = batch({("002",)}, "001", "002", "003")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    statuses = {r["filename"]: r["status"] for r in body["results"]}
+    assert statuses == {"001.png": "success", "002.png": "error", "003.png": "success"}
+    assert "crashed" in body["results"][1]["detail"]
+
+def test_crash_in_the_accurate_pass_keeps_the_fast_read(batch, monkeypatch):
+    # Every fast read asks for an accurate table re-read; 002's accurate re-read crashes
+    monkeypatch.setattr(ocr_router, "escalation_reasons", lambda tokens: {"table"} if tokens.info["pages"][0]["profile"] == "fast" else set())
+    body = batch({("002", "accurate")}, "001", "002").json()
+    assert body["succeeded"] == 2
+    methods = {r["filename"]: r["method"] for r in body["results"]}
+    assert "accurate" in methods["001.png"]
+    assert "accurate" not in methods["002.png"]
\ No newline at end of file
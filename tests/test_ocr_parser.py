@@ -0,0 +1,200 @@
+# The marks-card parser (ocr_router sections 5-7B) on synthetic OCR output: no PaddleOCR needed.
+import numpy as np
+import pytest
+
+from src.brain.routers.ocr_router import (
+    OcrTokens, extract_ocr_tokens, cluster_rows, split_marks, parse_table, parse_text_stream, merge_pages,
+)
+
+# Column x-centres of a VTU card
+CODE_X, INTERNAL_X, EXTERNAL_X, TOTAL_X, RESULT_X = 60, 300, 400, 500, 600
+HEADER = [(CODE_X, "Subject Code"), (INTERNAL_X, "Internal"), (EXTERNAL_X, "External"), (TOTAL_X, "Total"), (RESULT_X, "Result")]
+
+def tokens(*lines):
+    """
+    lines: (y, [(x, text), ...]) -> OcrTokens with a 40x12 box centred on each (x, y).
+    """
+    boxes, texts = [], []
+    for y, words in lines:
+        for x, text in words:
+            boxes.append([x - 20, y - 6, x + 20, y + 6])
+            texts.append(text)
+    return OcrTokens(np.array(boxes, dtype=np.float32), texts, np.full(len(texts), 0.99, dtype=np.float32))
+
+def row(y, code, *marks, result="P"):
+    xs = [INTERNAL_X, EXTERNAL_X, TOTAL_X][:len(marks)]
+    return (y, [(CODE_X, code)] + [(x, str(m)) for x, m in zip(xs, marks)] + [(RESULT_X, result)])
+
+def summary(subjects):
+    return [(s["code"], s["internal"], s["external"], s["total_marks"], s["grade"]) for s in subjects]
+
+# 1. Whole cards
+CARDS = {
+    "normal card": (
+        [(100, HEADER), row(140, "BCS401", 40, 45, 85), row(170, "BCS402", 35, 20, 55), row(200, "BCS403", 10, 12, 22, result="F")],
+        [("BCS401", 40, 45, 85, "P"), ("BCS402", 35, 20, 55, "P"), ("BCS403", 10, 12, 22, "F")],
+    ),
+    "rows slightly skewed": (
+        [(100, HEADER), (140, [(CODE_X, "BCS401"), (INTERNAL_X, "40"), (EXTERNAL_X, "45"), (TOTAL_X, "85"), (RESULT_X, "P")]),
+         (170, [(CODE_X, "BCS402"), (INTERNAL_X, "35"), (EXTERNAL_X, "20")]), (173, [(TOTAL_X, "55"), (RESULT_X, "P")])],
+        [("BCS401", 40, 45, 85, "P"), ("BCS402", 35, 20, 55, "P")],
+    ),
+    "missing external under its header": (
+        [(100, HEADER), (140, [(CODE_X, "BCS401"), (INTERNAL_X, "40"), (TOTAL_X, "40"), (RESULT_X, "P")])],
+        [("BCS401", 40, None, 40, "P")],
+    ),
+    "no headers, positional split": (
+        [row(140, "BCS401", 40, 45, 85), row(170, "BCS402", 35, 20, 55)],
+        [("BCS401", 40, 45, 85, "P"), ("BCS402", 35, 20, 55, "P")],
+    ),
+    "no result column": (
+        [(100, HEADER[:4]), (140, [(CODE_X, "BCS401"), (INTERNAL_X, "20"), (EXTERNAL_X, "10"), (TOTAL_X, "30")])],
+        [("BCS401", 20, 10, 30, "F")],
+    ),
+    "repeated code is read once": (
+        [(100, HEADER), row(140, "BCS401", 40, 45, 85), row(170, "BCS401", 1, 1, 2)],
+        [("BCS401", 40, 45, 85, "P")],
+    ),
+}
+
+@pytest.mark.parametrize("lines, expected", CARDS.values(), ids=CARDS.keys())
+def test_parse_table(lines, expected):
+    assert summary(parse_table(tokens(*lines))) == expected
+
+def test_card_split_across_two_pages():
+    # Page 2 restarts at y=0 with no header: merge_pages stacks it under page 1, so the columns still apply
+    first = tokens((100, HEADER), row(140, "BCS401", 40, 45, 85), row(170, "BCS402", 35, 20, 55))
+    second = tokens((30, [(CODE_X, "BCS403"), (INTERNAL_X, "38"), (TOTAL_X, "38"), (RESULT_X, "P")]), row(60, "BCSL404", 48, 50, 98))
+    merged = merge_pages([first, second])
+    assert len(merged.texts) == len(first.texts) + len(second.texts)
+    assert merged.boxes[len(first.texts):, 1].min() > first.boxes[:, 3].max()
+    assert summary(parse_table(merged)) == [
+        ("BCS401", 40, 45, 85, "P"),
+        ("BCS402", 35, 20, 55, "P"),
+        ("BCS403", 38, None, 38, "P"),
+        ("BCSL404", 48, 50, 98, "P"),
+    ]
+
+def test_merge_pages_collects_page_reads():
+    first = tokens(row(140, "BCS401", 40, 45, 85))._replace(info={"profile": "fast"})
+    second = OcrTokens.empty()._replace(info={"profile": "fast"})
+    assert merge_pages([first, second]).info == {"pages": [{"profile": "fast"}, {"profile": "fast"}]}
+
+def test_cluster_rows():
+    lines = tokens((100, [(60, "A"), (300, "B")]), (104, [(400, "C")]), (130, [(60, "D")]))
+    rows = cluster_rows(lines.boxes)
+    assert rows[0] == rows[1] == rows[2] != rows[3]
+
+# 2. Internal / external splits without headers
+SPLITS = [
+    ([40, 45, 85], (40, 45, 85)),
+    ([4, 40, 45, 85], (40, 45, 85)),   # A stray number (e.g. a semester) before the marks
+    ([40, 45, 90], (40, 45, 90)),      # No triple adds up: take the first three
+    ([40, 45], (40, 45, 85)),
+    ([85], (None, None, 85)),
+    ([], (None, None, 0)),
+]
+
+@pytest.mark.parametrize("values, expected", SPLITS)
+def test_split_marks(values, expected):
+    assert split_marks(values) == expected
+
+# 3. PaddleOCR result shapes
+def paddle_3x(with_boxes=True):
+    page = {
+        "rec_texts": ["Internal", "External", "Total", "BCS401", "40", "45", "85", "P"],
+        "rec_scores": [0.99, 0.98, 0.97, 0.96, 0.95, 0.94, 0.93, 0.92],
+    }
+    centres = [(INTERNAL_X, 100), (EXTERNAL_X, 100), (TOTAL_X, 100), (CODE_X, 140), (INTERNAL_X, 140), (EXTERNAL_X, 140), (TOTAL_X, 140), (RESULT_X, 140)]
+    if with_boxes:
+        page["rec_boxes"] = np.array([[x - 20, y - 6, x + 20, y + 6] for x, y in centres])
+    else:
+        page["rec_boxes"] = np.zeros((0, 4))
+        page["rec_polys"] = [np.array([[x - 20, y - 6], [x + 20, y - 6], [x + 20, y + 6], [x - 20, y + 6]]) for x, y in centres]
+    return [page]
+
+def paddle_2x():
+    rows = paddle_3x()[0]
+    return [[
+        [[[b[0], b[1]], [b[2], b[1]], [b[2], b[3]], [b[0], b[3]]], (text, score)]
+        for b, text, score in zip(rows["rec_boxes"], rows["rec_texts"], rows["rec_scores"])
+    ]]
+
+@pytest.mark.parametrize("result", [paddle_3x(), paddle_3x(with_boxes=False), paddle_2x()], ids=["3.x boxes", "3.x polys", "2.x"])
+def test_paddle_results(result):
+    read = extract_ocr_tokens(result)
+    assert read.texts[3] == "BCS401"
+    assert read.boxes.shape == (8, 4)
+    np.testing.assert_allclose(read.boxes[3], [40, 134, 80, 146])
+    assert read.confs.dtype == np.float32 and read.confs[0] == pytest.approx(0.99)
+    assert summary(parse_table(read)) == [("BCS401", 40, 45, 85, "P")]
+
+def test_unknown_result_shape_keeps_words_only():
+    read = extract_ocr_tokens([{"texts": ["BCS401", "40", "45", "85", "P"]}])
+    assert np.isnan(read.boxes).all()
+    assert parse_table(read) == []
+    assert summary(parse_text_stream(read.texts)) == [("BCS401", None, None, 85, "P")]
+
+def test_empty_results():
+    assert extract_ocr_tokens(None).texts == []
+    assert extract_ocr_tokens([None, []]).texts == []
+    assert parse_table(OcrTokens.empty()) == []
+
+# 4. Escalation (fake engine: the table crop has the marks, only the page above it has the USN)
+class FakeEngine:
+    def __init__(self, profile, calls):
+        self.profile = profile
+        self.calls = calls
+
+    def ocr(self, img):
+        self.calls.append((self.profile, img.shape[0]))
+        if img.shape[0] == 250:  # Above the crop: rules at 400 and 800, headroom 0.15 * 1000
+            return [[[[[50, 100], [250, 100], [250, 120], [50, 120]], ("USN: 1AB22CS001", 0.99)]]]
+        lines = tokens((100, HEADER), row(140, "BCS401", 40, 45, 85))
+        return [[
+            [[[b[0], b[1]], [b[2], b[1]], [b[2], b[3]], [b[0], b[3]]], (text, 0.99)]
+            for b, text in zip(lines.boxes.tolist(), lines.texts)
+        ]]
+
+@pytest.fixture
+def ruled_page(monkeypatch):
+    from src.brain.routers import ocr_router
+    calls = []
+    monkeypatch.setattr(ocr_router, "get_ocr_engine", lambda profile="accurate": FakeEngine(profile, calls))
+    img = np.full((1000, 800, 3), 255, dtype=np.uint8)
+    img[400, :] = img[800, :] = 0  # Table rules
+    return ocr_router, img, calls
+
+def test_missing_usn_reads_the_header_not_the_crop_again(ruled_page):
+    ocr_router, img, calls = ruled_page
+    page, info = ocr_router.read_region(img, retry=lambda: img, profile="fast")
+    first = merge_pages([page._replace(info=info)])
+    reasons = ocr_router.escalation_reasons(first)
+    assert reasons == {"header"}
+
+    header, header_info = ocr_router.read_region(img, retry=lambda: img, profile="accurate", region="header")
+    final = ocr_router.apply_escalation(first, merge_pages([header._replace(info=header_info)]), reasons)
+    assert ocr_router.extract_student_details(final.texts)[0] == "1AB22CS001"
+    assert summary(parse_table(final)) == [("BCS401", 40, 45, 85, "P")]
+    assert calls == [("fast", 570), ("accurate", 250)]  # One crop read, one header read: no accurate re-read of the crop
+    assert ocr_router.escalation_reasons(final) == set()
+
+def test_unsure_read_escalates_the_table(ruled_page):
+    ocr_router, img, _ = ruled_page
+    page = tokens((100, HEADER), row(140, "BCS401", 40, 45, 85))
+    unsure = page._replace(confs=np.full(len(page.texts), 0.5, dtype=np.float32))
+    read = {"region": "table", "cropped": True, "retried": False, "profile": "fast", "escalated": False}
+    assert ocr_router.escalation_reasons(merge_pages([unsure._replace(info=read)])) == {"table", "header"}
+    # Without a crop the table read already saw the whole page: a header read can't add anything
+    uncropped = merge_pages([unsure._replace(info={**read, "cropped": False})])
+    assert ocr_router.escalation_reasons(uncropped) == {"table"}
+
+def test_escalation_jobs():
+    from src.brain.routers.ocr_router import escalation_jobs, ocr_pdf_page
+    jobs = [(ocr_pdf_page, (b"pdf", 0)), (ocr_pdf_page, (b"pdf", 1))]
+    assert escalation_jobs(jobs, {"header"}) == [(ocr_pdf_page, (b"pdf", 0, "accurate", "header"))]
+    assert escalation_jobs(jobs, {"table", "header"}) == [
+        (ocr_pdf_page, (b"pdf", 0, "accurate", "header")),
+        (ocr_pdf_page, (b"pdf", 0, "accurate")),
+        (ocr_pdf_page, (b"pdf", 1, "accurate")),
+    ]
\ No newline at end of file
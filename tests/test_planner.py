@@ -0,0 +1,56 @@
+# The columnar cohort path must give every student exactly what the one-student calculator gives.
+import numpy as np
+import pandas as pd
+
+from src.brain.toolbelt.planner import Planner, CourseInput, grade_points
+
+SPELLINGS = ["O", "A+", "a+ ", "A", " b+", "B", "c", "P", "F", "AB", "ab", "X", ""]  # Mixed case, padding, unknowns
+
+def cohort(students=40, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(students):
+        for semester in range(1, rng.integers(2, 5)):
+            for c in range(rng.integers(3, 8)):
+                rows.append({
+                    "usn": f"1AB22CS{s:03d}",
+                    "semester": int(semester),
+                    "name": f"Course {semester}.{c}",
+                    "credits": int(rng.choice([0, 1, 2, 3, 4])),
+                    "grade": str(rng.choice(SPELLINGS)),
+                })
+    return pd.DataFrame(rows)
+
+def test_bulk_sgpa_matches_calculate_sgpa():
+    courses = cohort()
+    semesters, students = Planner.bulk_sgpa(courses)
+    assert len(semesters) == courses.groupby(["usn", "semester"]).ngroups
+
+    by_key = semesters.set_index(["usn", "semester"])
+    for (usn, semester), group in courses.groupby(["usn", "semester"]):
+        expected = Planner.calculate_sgpa([CourseInput(**row) for row in group[["name", "credits", "grade"]].to_dict("records")])
+        row = by_key.loc[(usn, semester)]
+        assert (row["total_credits"], row["earned_points"]) == (expected.total_credits, expected.earned_points)
+        assert row["sgpa"] == expected.sgpa
+        failed = expected.status[len("Fail ("):-1].split(", ") if expected.status.startswith("Fail") else []
+        assert row["failed_courses"] == len(failed)
+
+    # CGPA: credit-weighted mean of the rounded SGPAs, as the dashboard shows it
+    for usn, group in semesters.groupby("usn"):
+        student = students.set_index("usn").loc[usn]
+        credits = group["total_credits"].sum()
+        assert student["total_credits"] == credits
+        assert student["semesters"] == len(group)
+        assert student["cgpa"] == (round((group["sgpa"] * group["total_credits"]).sum() / credits, 2) if credits else 0.0)
+
+def test_grade_points_normalizes_like_calculate_sgpa():
+    points, known = grade_points(np.array(["a+ ", " O", "b+", "X", "AB", ""], dtype=object))
+    assert points.tolist() == [9, 10, 7, 0, 0, 0]
+    assert known.tolist() == [True, True, True, False, True, False]
+
+def test_semester_without_credits():
+    courses = pd.DataFrame({"usn": ["1AB22CS001"] * 2, "semester": [1, 1], "credits": [0, 0], "grade": ["A", "F"]})
+    semesters, students = Planner.bulk_sgpa(courses)
+    assert semesters.loc[0, "sgpa"] == 0.0 and semesters.loc[0, "total_credits"] == 0
+    assert students.loc[0, "cgpa"] == 0.0
+    assert Planner.calculate_sgpa([CourseInput(name="a", credits=0, grade="A")]).sgpa == 0.0
\ No newline at end of file
@@ -0,0 +1,81 @@
+# Hybrid retrieval: reciprocal rank fusion and the version-tagged caches in front of the search.
+import pytest
+
+pytest.importorskip("langchain_huggingface")  # retrieval -> embeddings
+
+from langchain_core.documents import Document
+
+from src.brain.librarian import retrieval
+
+def doc(cid, text=None):
+    return Document(id=cid, page_content=text or f"rule {cid}")
+
+def ids(docs):
+    return [d.id for d in docs]
+
+def test_fuse_rewards_agreement():
+    vector = [doc("a"), doc("b"), doc("c")]
+    lexical = [doc("c"), doc("d")]
+    # c: 1/63 + 1/61 beats a: 1/61 alone
+    assert ids(retrieval.fuse([vector, lexical], k=4, rrf_k=60)) == ["c", "a", "b", "d"]
+
+def test_fuse_ties_keep_the_first_ranking_first():
+    assert ids(retrieval.fuse([[doc("a"), doc("b")], [doc("b"), doc("a")]], k=2)) == ["a", "b"]
+    assert ids(retrieval.fuse([[doc("a")], [doc("x")]], k=2)) == ["a", "x"]
+
+def test_fuse_cuts_to_k_and_keeps_one_copy():
+    fused = retrieval.fuse([[doc("a"), doc("b")], [doc("a", "rule a, as BM25 stored it")]], k=1)
+    assert ids(fused) == ["a"]
+    assert fused[0].page_content == "rule a"  # The first ranking's copy of a chunk is kept
+
+def test_fuse_matches_chunks_without_ids_by_text():
+    vector = [Document(page_content="attendance"), Document(page_content="re-exam")]
+    lexical = [Document(page_content="re-exam")]
+    assert [d.page_content for d in retrieval.fuse([vector, lexical], k=2)] == ["re-exam", "attendance"]
+
+class CountingModel:
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [1.0, float(len(self.queries)), 0.0]
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    model, searches = CountingModel(), []
+    def search_vectors(vector, k=3, ef_search=None, probes=None):
+        searches.append(vector)
+        return [doc(f"v{len(searches)}")]
+    monkeypatch.setattr(retrieval, "VERSION_FILE", str(tmp_path / "index" / "rules.version"))
+    monkeypatch.setattr(retrieval, "embedding_cache", retrieval.TTLCache("test.embedding_cache"))
+    monkeypatch.setattr(retrieval, "results_cache", retrieval.TTLCache("test.results_cache"))
+    monkeypatch.setattr(retrieval, "get_embeddings", lambda: model)
+    monkeypatch.setattr(retrieval, "search_vectors", search_vectors)
+    monkeypatch.setattr(retrieval, "HYBRID_SEARCH", False)
+    return model, searches
+
+def test_version_bump_refills_both_caches(collection):
+    model, searches = collection
+    retrieval.mark_collection_changed()
+    first = retrieval.retrieve("What are the Re-Exam rules?")
+    assert ids(retrieval.retrieve("what are the re-exam rules")) == ids(first)  # Same normalized question
+    assert len(model.queries) == 1 and len(searches) == 1
+
+    old_version = retrieval.collection_version()
+    retrieval.mark_collection_changed()  # ingest.py wrote to the collection
+    assert retrieval.collection_version() != old_version
+
+    fresh = retrieval.retrieve("What are the Re-Exam rules?")
+    assert ids(fresh) != ids(first)
+    assert len(model.queries) == 2 and len(searches) == 2  # Both caches missed
+    assert retrieval.embed_question("what are the re-exam rules") == [1.0, 2.0, 0.0]  # ...and were refilled
+    assert ids(retrieval.retrieve("What are the Re-Exam rules?")) == ids(fresh)
+    assert len(model.queries) == 2 and len(searches) == 2
+
+def test_missing_version_file_still_caches(collection):
+    model, searches = collection
+    assert retrieval.collection_version() == ""
+    retrieval.retrieve("grace marks")
+    retrieval.retrieve("grace marks")
+    assert len(model.queries) == 1 and len(searches) == 1
\ No newline at end of file
@@ -0,0 +1,43 @@
+# The Doctor's cheat sheet: a compiled RiskTable must answer exactly what XGBoost answers.
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from src.brain.toolbelt.risk_table import RiskTable, FEATURES, LOWS, HIGHS, grid, verify
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    rows = rng.integers(LOWS, HIGHS + 1, size=(400, len(FEATURES)))
+    at_risk = (rows[:, 1] * 2 + rows[:, 2] / 20 - rows[:, 0] + rng.normal(0, 1, len(rows))) > 2
+    classifier = xgb.XGBClassifier(n_estimators=20, max_depth=3, objective="binary:logistic", n_jobs=1, random_state=0)
+    return classifier.fit(pd.DataFrame(rows, columns=FEATURES), at_risk.astype(int))
+
+@pytest.fixture(scope="module")
+def table(model):
+    return RiskTable.compile(model)
+
+def test_table_matches_the_model_everywhere(model, table):
+    assert table.probabilities.size == len(grid())
+    assert verify(model, table) == 0
+    assert verify(model, table, samples=50) == 0  # The one-row DataFrame path the API used to take
+
+def test_verify_catches_a_wrong_entry(model, table):
+    broken = RiskTable(table.probabilities.copy())
+    broken.probabilities[0, 0, 0, 0, 0, 0] += 0.25
+    assert verify(model, broken) == 1
+
+def test_lookup_many(model, table):
+    rows = [[2, 1, 10, 3, 3, 1], [4, 3, 93, 5, 5, 5], [0, 1, 10, 3, 3, 1], [2, 4, 10, 3, 3, 1], [2, 1, 94, 3, 3, 1]]
+    probabilities, mask = table.lookup_many(rows)
+    assert mask.tolist() == [True, True, False, False, False]
+    assert np.isnan(probabilities[~mask]).all()
+    expected = model.predict_proba(pd.DataFrame(rows[:2], columns=FEATURES))[:, 1].astype(np.float32)
+    np.testing.assert_array_equal(probabilities[mask], expected)
+    assert [table.lookup(row) for row in rows] == [float(p) for p in probabilities[:2]] + [None] * 3
+
+def test_lookup_many_empty(table):
+    probabilities, mask = table.lookup_many(np.zeros((0, len(FEATURES))))
+    assert probabilities.shape == mask.shape == (0,)
\ No newline at end of file
@@ -0,0 +1,95 @@
+# The Eye's two-tier result cache in a throwaway directory, on a fake clock.
+import os
+import pytest
+
+from src.brain.toolbelt import metrics, scan_cache as scan_cache_module
+from src.brain.toolbelt.scan_cache import ScanCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scan_cache_module, "time", clock)
+    return clock
+
+def counters():
+    return {k: v for k, v in metrics.snapshot()["counters"].items() if k.startswith("scan_cache.")}
+
+def delta(before):
+    after = counters()
+    return {k: after[k] - before.get(k, 0) for k in after if after[k] != before.get(k, 0)}
+
+def files(cache_dir):
+    return sorted(name for _, _, names in os.walk(cache_dir) for name in names if name.endswith(".json"))
+
+def card(usn, padding=0):
+    return {"usn": usn, "subjects": [], "padding": "x" * padding}
+
+def test_memory_then_disk_hits(tmp_path, clock):
+    before = counters()
+    cache = ScanCache(str(tmp_path))
+    key = ScanCache.key_for(b"card", ".pdf")
+    assert cache.get(key, "fp1") is None
+    cache.put(key, "fp1", card("1AB22CS001"))
+    assert cache.get(key, "fp1") == card("1AB22CS001")
+    # A restarted API has only the disk tier
+    assert ScanCache(str(tmp_path)).get(key, "fp1") == card("1AB22CS001")
+    assert delta(before) == {"scan_cache.misses": 1, "scan_cache.hits.memory": 1, "scan_cache.hits.disk": 1}
+
+def test_key_depends_on_the_kind():
+    assert ScanCache.key_for(b"same", ".png") != ScanCache.key_for(b"same", ".pdf")
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = ScanCache(str(tmp_path), ttl_seconds=60)
+    cache.put("aa01", "fp", card("1"))
+    clock.now += 61
+    assert cache.get("aa01", "fp") is None
+    assert files(tmp_path) == []  # Expired file removed on read
+    assert cache.stats()["disk_bytes"] == 0
+
+def test_registry_fingerprint_invalidates(tmp_path, clock):
+    before = counters()
+    cache = ScanCache(str(tmp_path))
+    cache.put("aa01", "fp1", card("1"))
+    assert cache.get("aa01", "fp2") is None
+    assert files(tmp_path) == []
+    assert delta(before)["scan_cache.invalidations"] == 2  # The memory entry, then the disk file
+
+def test_memory_lru(tmp_path, clock):
+    cache = ScanCache(str(tmp_path), memory_items=2)
+    cache.put("aa01", "fp", card("1"))
+    cache.put("aa02", "fp", card("2"))
+    cache.get("aa01", "fp")             # aa02 is now the least recently used
+    cache.put("aa03", "fp", card("3"))
+    assert list(cache._memory) == ["aa01", "aa03"]
+    before = counters()
+    assert cache.get("aa02", "fp") == card("2")  # Still on disk
+    assert delta(before) == {"scan_cache.hits.disk": 1}
+
+def test_overwrite_is_not_counted_twice(tmp_path, clock):
+    cache = ScanCache(str(tmp_path))
+    cache.put("aa01", "fp", card("1", padding=100))
+    cache.put("aa01", "fp", card("1", padding=100))  # Re-stored after expiry
+    assert cache.stats()["disk_bytes"] == cache._measure_disk()[1]
+
+def test_disk_eviction_drops_least_recently_used_down_to_90_percent(tmp_path, clock):
+    cache = ScanCache(str(tmp_path), max_disk_bytes=10_000)
+    for i in range(9):
+        cache.put(f"aa{i:02d}", "fp", card(str(i), padding=1000))
+        path = cache._path(f"aa{i:02d}")
+        os.utime(path, (1000 + i, 1000 + i))  # aa00 oldest
+    assert files(tmp_path) == [f"aa{i:02d}.json" for i in range(9)]
+
+    before = counters()
+    cache.put("aa09", "fp", card("9", padding=1000))
+    assert cache.stats()["disk_bytes"] <= 9_000
+    assert cache.stats()["disk_bytes"] == cache._measure_disk()[1]
+    remaining = files(tmp_path)
+    assert "aa00.json" not in remaining and "aa09.json" in remaining
+    assert delta(before)["scan_cache.evictions"] == 10 - len(remaining)
\ No newline at end of file
@@ -0,0 +1,46 @@
+# Picking the Doctor: the best-ranked candidate that fits both latency budgets, timed one at a time.
+import pytest
+
+pytest.importorskip("xgboost")
+
+from src.brain.toolbelt import train_doctor
+
+# params id -> (µs/row, table build seconds), as measured in the parent
+TIMINGS = {"big": (5.0, 0.5), "slow-table": (1.0, 9.0), "small": (1.0, 0.5), "tiny": (0.5, 0.2)}
+
+class FakeModel:
+    def __init__(self, params):
+        self.params = params
+
+    def fit(self, X, y):
+        return self
+
+def candidate(name, auc, accuracy=0.9, size=100):
+    return {"params": {"id": name}, "auc": auc, "accuracy": accuracy, "size_bytes": size}
+
+@pytest.fixture
+def timed(monkeypatch):
+    measured = []
+    monkeypatch.setattr(train_doctor, "make_model", lambda params, seed: FakeModel(params))
+    def latency(model, X):
+        measured.append(model.params["id"])
+        return TIMINGS[model.params["id"]][0], 100.0
+    monkeypatch.setattr(train_doctor, "measure_latency", latency)
+    monkeypatch.setattr(train_doctor, "measure_table_build", lambda model: TIMINGS[model.params["id"]][1])
+    return measured
+
+def test_best_candidate_within_both_budgets(timed):
+    results = [candidate("tiny", 0.80), candidate("small", 0.85), candidate("slow-table", 0.90), candidate("big", 0.95)]
+    best, model = train_doctor.select(results, None, None, 0, latency_budget_us=2.0, table_budget_s=2.0)
+    assert best["params"] == {"id": "small"} and model.params == {"id": "small"}
+    assert timed == ["big", "slow-table", "small"]  # Rank order, stopping at the first that fits
+    assert "latency_us_per_row" not in results[0]   # "tiny" was never timed
+
+def test_ties_prefer_the_smaller_model(timed):
+    results = [candidate("small", 0.9, size=500), candidate("tiny", 0.9, size=50)]
+    best, _ = train_doctor.select(results, None, None, 0, latency_budget_us=2.0, table_budget_s=2.0)
+    assert best["params"] == {"id": "tiny"}
+
+def test_nothing_fits(timed):
+    results = [candidate("big", 0.95), candidate("slow-table", 0.9)]
+    assert train_doctor.select(results, None, None, 0, latency_budget_us=2.0, table_budget_s=2.0) == (None, None)
\ No newline at end of file